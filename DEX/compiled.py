@@ -0,0 +1,406 @@
+#Compiled DEX models: every utility function is a dense table indexed by the codes of its input values
+#(position of the value in the scale of the attribute), so a batch of alternatives is evaluated
+#with a few indexing operations on int8 arrays instead of a search through the rules of every alternative
+import numpy as np
+import pandas as pd
+
+# Code of the combinations of the input values which are not covered by any rule
+NO_RULE = -1
+
+# Value of an input attribute which stands for all values of its scale
+ANY_VALUE = '*'
+
+# Largest scale of the value sets (one bit of a uint64 for every value of the scale)
+max_scale_size = 64
+
+# Largest flattened table of the whole model (number of combinations of the input attributes)
+max_table_size = 2 ** 24
+
+
+class CompiledFunction:
+    """
+    Dense table of a DEX utility function.
+
+    ``rule_table[c_1, ..., c_k]`` is the first rule for the codes ``c_i`` of the input values and
+    ``table[c_1, ..., c_k]`` is the code of its output value (:data:`NO_RULE` when no rule covers the combination).
+    QQ and Gini population functions keep their weights ``w`` and the ``kc``/``nc`` coefficients of every
+    output class by the code of the class.
+
+    :param function: Utility function of the model.
+    :type function: :class:`DEX.components.DEXFunction` or a derived class
+    """
+    def __init__(self, function):
+        self.name = function.name
+        self.level = function.level
+        self.inputs = [a.name for a in function.attr_list]
+        self.shape = tuple(len(a.scale.scalevalue) for a in function.attr_list)
+        self.output_scale = list(function.my_attribute.scale.scalevalue)
+
+        rule_codes = [ScaleCodes(function.rules[a.name], list(a.scale.scalevalue), a.name)
+                      for a in function.attr_list]
+        self.output_codes = ScaleCodes(function.output_values, self.output_scale, self.name)
+
+        # Rules are written in reverse, so the first rule of a repeated combination is kept
+        self.rule_table = np.full(self.shape, NO_RULE, dtype=np.int32)
+        self.rule_table[tuple(codes[::-1] for codes in rule_codes)] = np.arange(len(self.output_codes))[::-1]
+
+        self.table = np.where(self.rule_table == NO_RULE, NO_RULE,
+                              self.output_codes[self.rule_table]).astype(np.int8)
+
+        # Packed rule bitmasks: rules with every value of every input and rules with every output value
+        self.value_masks = [PackRules(codes[None, :] == np.arange(size)[:, None])
+                            for codes, size in zip(rule_codes, self.shape)]
+        self.output_masks = PackRules(self.output_codes[None, :] == np.arange(len(self.output_scale))[:, None])
+
+        self.qq = function.should_map_to_qq()
+        if self.qq:
+            # QQ appends a bias to the weights of the inputs, Gini population has none
+            self.w = np.asarray(function.w, dtype=np.float64)
+            self.bias = len(self.w) > len(self.inputs)
+
+            # kc and nc by the code of the output class (qq values of the classes are 1..L)
+            self.kc = np.full(len(self.output_scale), np.nan)
+            self.nc = np.full(len(self.output_scale), np.nan)
+            for c in function.kc:
+                self.kc[int(round(c)) - 1] = function.kc[c]
+                self.nc[int(round(c)) - 1] = function.nc[c]
+
+    def evaluate(self, codes):
+        """
+        Output codes of a batch of alternatives.
+
+        :param codes: Codes of the input values (alternatives x inputs).
+        :type codes: numpy.ndarray
+        :return: int8 codes of the output values.
+        :rtype: numpy.ndarray
+        """
+        out = self.table[tuple(np.asarray(codes).T)]
+
+        if np.any(out == NO_RULE):
+            raise Exception("Wrong number of rules executed [] for rule %s" % self.name)
+
+        return out
+
+    def evaluate_qq(self, A):
+        """
+        QQ values of a batch of alternatives, the vectorized form of ``local_evaluate`` of
+        :class:`DEX.qq_function.DEXFunctionQQ` and :class:`DEX.gini_population.DEXFunctionGiniPop`.
+
+        The rule class is looked up in the table with the rounded input values,
+        the output is ``kc[c] * g + nc[c]`` with ``g = A @ w`` (QQ appends 1 to the inputs for the bias).
+
+        :param A: QQ values of the inputs (alternatives x inputs).
+        :type A: numpy.ndarray
+        :return: QQ values of the output attribute.
+        :rtype: numpy.ndarray
+        """
+        A = np.asarray(A, dtype=np.float64)
+
+        # QQ values of a scale are 1..L, the code of a value is one less
+        codes = np.round(A).astype(np.intp) - 1
+        if np.any((codes < 0) | (codes >= np.array(self.shape))):
+            raise Exception("Wrong number of rules executed [] for rule %s" % self.name)
+
+        c = self.evaluate(codes)
+
+        if self.bias:
+            A = np.column_stack([A, np.ones(len(A))])
+
+        return self.kc[c] * (A @ self.w) + self.nc[c]
+
+
+    def evaluate_sets(self, value_sets):
+        """
+        Output value sets of a batch of alternatives, the vectorized form of
+        :meth:`DEX.components.DEXFunction.evaluate`.
+
+        The rules of an input are the union (OR) of the rule masks of the values in its set,
+        the executed rules are the intersection (AND) over the inputs and the output set has
+        the values of the executed rules.
+
+        :param value_sets: Value set bitmasks of the inputs (alternatives x inputs, bit i for the i-th scale value).
+        :type value_sets: numpy.ndarray
+        :return: uint64 value set bitmasks of the output values.
+        :rtype: numpy.ndarray
+        """
+        value_sets = np.asarray(value_sets, dtype=np.uint64)
+
+        executed = None
+        for j, masks in enumerate(self.value_masks):
+            rules = np.zeros((len(value_sets), masks.shape[1]), dtype=np.uint64)
+            for v in range(len(masks)):
+                has = (value_sets[:, j] >> np.uint64(v)) & np.uint64(1)
+                rules |= masks[v] * has[:, None]
+
+            executed = rules if executed is None else executed & rules
+
+        if not np.all(executed.any(axis=1)):
+            raise Exception("Wrong number of rules executed [] for rule %s" % self.name)
+
+        out = np.zeros(len(value_sets), dtype=np.uint64)
+        for o in range(len(self.output_masks)):
+            out |= (executed & self.output_masks[o]).any(axis=1).astype(np.uint64) << np.uint64(o)
+
+        return out
+
+
+def PackRules(selected):
+    # Boolean matrix (values x rules) packed to uint64 words of rule bits
+    words = (selected.shape[1] + 63) // 64
+    padded = np.zeros((selected.shape[0], words * 64), dtype=bool)
+    padded[:, :selected.shape[1]] = selected
+
+    return np.packbits(padded, axis=1, bitorder='little').view(np.uint64)
+
+
+def ValueSets(values, scale, name):
+    """
+    Value set bitmasks of the inputs of an attribute.
+
+    :param values: A value, ``*`` or a list of values of every alternative.
+    :param list scale: Values of the scale of the attribute.
+    :param str name: The name of the attribute.
+    :return: uint64 bitmasks with bit i set for the i-th value of the scale.
+    :rtype: numpy.ndarray
+    """
+    if len(scale) > max_scale_size:
+        raise ValueError("Scale of %s has %d > %d values" % (name, len(scale), max_scale_size))
+
+    items = np.empty(len(values), dtype=object)
+    items[:] = list(values)
+
+    bits = np.uint64(1) << np.arange(len(scale), dtype=np.uint64)
+    sets = np.zeros(len(items), dtype=np.uint64)
+
+    # Single values (the common case) are encoded at once, '*' is the set of all values of the scale
+    single = np.array([isinstance(item, str) for item in items], dtype=bool)
+    codes = pd.Categorical(items[single], categories=list(scale) + [ANY_VALUE]).codes
+    if np.any(codes < 0):
+        raise ValueError("Values %s are not in the scale of %s" % (list(np.unique(items[single][codes < 0])), name))
+    value_bits = np.append(bits, np.bitwise_or.reduce(bits))
+    sets[single] = value_bits[codes]
+
+    # Lists of values are the union of the bits of their values
+    lookup = dict(zip(list(scale) + [ANY_VALUE], value_bits.tolist()))
+    for i in np.flatnonzero(~single):
+        for value in np.asarray(items[i]).ravel():
+            if value not in lookup:
+                raise ValueError("Values %s are not in the scale of %s" % ([value], name))
+            sets[i] |= np.uint64(lookup[value])
+
+    return sets
+
+
+def ScaleCodes(values, scale, name):
+    # Position of every value in the scale of the attribute
+    codes = pd.Categorical(np.asarray(values).ravel(), categories=scale).codes
+
+    if np.any(codes < 0):
+        unknown = np.unique(np.asarray(values).ravel()[codes < 0])
+        raise ValueError("Values %s are not in the scale of %s" % (list(unknown), name))
+
+    return codes.astype(np.int8)
+
+
+class CompiledModel:
+    """
+    DEX model with all utility functions compiled to dense tables.
+
+    The functions are evaluated level by level on arrays of codes, the code of an aggregated attribute is
+    an input of the functions of the next levels.
+
+    :param model: The model to compile.
+    :type model: :class:`DEX.dex.DEXModel`
+    """
+    def __init__(self, model):
+        self.functions = [CompiledFunction(f) for f in sorted(model.functions.values(), key=lambda f: f.level)]
+        self.scales = {name: list(a.scale.scalevalue) for name, a in model.attributes.items()}
+        self.inputs = [name for name, a in model.attributes.items() if a.level == 1]
+        self.output = self.functions[-1].name
+
+        self.flat_table = None
+
+    def encode(self, data):
+        """
+        Codes of the values of the input attributes.
+
+        :param data: Values of the input attributes by attribute name (DataFrame or dict of arrays).
+        :return: Dictionary of int8 code arrays by attribute name.
+        :rtype: dict
+        """
+        return {name: ScaleCodes(data[name], self.scales[name], name) for name in self.inputs}
+
+    def decode(self, codes):
+        """
+        Values of the codes of the attributes.
+
+        :param dict codes: Code arrays by attribute name.
+        :return: Values of the attributes.
+        :rtype: pandas.DataFrame
+        """
+        return pd.DataFrame({name: np.array(self.scales[name], dtype=object)[values]
+                             for name, values in codes.items()})
+
+    def evaluate_codes(self, codes):
+        """
+        Codes of all aggregated attributes of a batch of alternatives.
+
+        :param dict codes: int8 code arrays of the input attributes (:meth:`encode`).
+        :return: Code arrays of the input and the aggregated attributes.
+        :rtype: dict
+        """
+        codes = dict(codes)
+
+        for f in self.functions:
+            codes[f.name] = f.evaluate(np.column_stack([codes[name] for name in f.inputs]))
+
+        return codes
+
+    def evaluate(self, data):
+        """
+        Qualitative evaluation of a batch of alternatives, the vectorized form of
+        :meth:`DEX.dex.DEXModel.evaluate_model` (one value of every attribute, ``*`` is not supported).
+
+        :param data: Values of the input attributes by attribute name (DataFrame or dict of arrays).
+        :return: Values of the input and the aggregated attributes of every alternative.
+        :rtype: pandas.DataFrame
+        """
+        result = self.decode(self.evaluate_codes(self.encode(data)))
+
+        if isinstance(data, pd.DataFrame):
+            result.index = data.index
+
+        return result
+
+    def evaluate_value_sets(self, data):
+        """
+        Value set bitmasks of all attributes of a batch of alternatives.
+
+        :param data: Values of the input attributes by attribute name (DataFrame or dict of arrays),
+            an input is a value, ``*`` or a list of values.
+        :return: Dictionary of the uint64 value set bitmasks of the input and the aggregated attributes.
+        :rtype: dict
+        """
+        sets = {name: ValueSets(data[name], self.scales[name], name) for name in self.inputs}
+
+        for f in self.functions:
+            sets[f.name] = f.evaluate_sets(np.column_stack([sets[name] for name in f.inputs]))
+
+        return sets
+
+    def decode_sets(self, name, sets):
+        """
+        Values in the value sets of an attribute, in the form of :meth:`DEX.components.DEXFunction.evaluate`.
+
+        :param str name: The name of the attribute.
+        :param sets: Value set bitmasks.
+        :return: Array of the values (sorted by :func:`numpy.unique`) of every set.
+        :rtype: numpy.ndarray
+        """
+        scale = np.array(self.scales[name])
+        unique_sets, inverse = np.unique(sets, return_inverse=True)
+
+        bits = (unique_sets[:, None] >> np.arange(len(scale), dtype=np.uint64)) & np.uint64(1)
+        decoded = [np.unique(scale[row.astype(bool)]) for row in bits]
+
+        values = np.empty(len(sets), dtype=object)
+        values[:] = [decoded[i].copy() for i in inverse.ravel()]
+
+        return values
+
+    def evaluate_sets(self, data):
+        """
+        Qualitative evaluation of a batch of alternatives with ``*`` and multi-valued inputs,
+        every cell has the same array of values as the result of :meth:`DEX.dex.DEXModel.evaluate_model`.
+
+        :param data: Values of the input attributes by attribute name (DataFrame or dict of arrays).
+        :return: Arrays of the values of the aggregated attributes of every alternative.
+        :rtype: pandas.DataFrame
+        """
+        sets = self.evaluate_value_sets(data)
+        result = pd.DataFrame({f.name: self.decode_sets(f.name, sets[f.name]) for f in self.functions})
+
+        if isinstance(data, pd.DataFrame):
+            result.index = data.index
+
+        return result
+
+    def qq_matrix(self, data):
+        """
+        QQ values of the input attributes (the values of :meth:`DEX.components.Attribute.map_qq`).
+
+        :param data: Values of the input attributes by attribute name (DataFrame or dict of arrays).
+        :return: QQ matrix (alternatives x input attributes in the order of :attr:`inputs`).
+        :rtype: numpy.ndarray
+        """
+        codes = self.encode(data)
+
+        return np.column_stack([codes[name] for name in self.inputs]).astype(np.float64) + 1
+
+    def evaluate_qq(self, A):
+        """
+        QQ evaluation of a batch of alternatives, the vectorized form of :meth:`DEX.dex.DEXModel.evaluate_model`
+        of a QQ or Gini population model (one value of every attribute, ``*`` is not supported).
+
+        :param A: QQ matrix (alternatives x input attributes in the order of :attr:`inputs`, :meth:`qq_matrix`).
+        :type A: numpy.ndarray
+        :return: Dictionary of the QQ value arrays of the input and the aggregated attributes.
+        :rtype: dict
+        """
+        A = np.asarray(A, dtype=np.float64)
+        if A.ndim != 2 or A.shape[1] != len(self.inputs):
+            raise ValueError("QQ matrix %s does not match the %d input attributes" % (A.shape, len(self.inputs)))
+
+        values = dict(zip(self.inputs, A.T))
+
+        for f in self.functions:
+            if not f.qq:
+                raise ValueError("Function %s is not a QQ function" % f.name)
+            values[f.name] = f.evaluate_qq(np.column_stack([values[name] for name in f.inputs]))
+
+        return values
+
+    def flatten(self, max_size=max_table_size):
+        """
+        Compose the whole tree into one table of the output codes indexed by the codes of the input attributes.
+
+        Every function indexes its table with the open grid of the input codes of its subtree,
+        so only the final table has the size of all combinations of the input attributes.
+
+        :param int max_size: Largest number of combinations of the input attributes.
+        :return: int8 table of the output codes (one axis for every input attribute in :attr:`inputs`).
+        :rtype: numpy.ndarray
+        """
+        sizes = [len(self.scales[name]) for name in self.inputs]
+        if np.prod(sizes, dtype=np.float64) > max_size:
+            raise ValueError("Flattened table of %d input attributes has %d > %d entries" %
+                             (len(sizes), np.prod(sizes, dtype=np.float64), max_size))
+
+        grid = {name: np.arange(size, dtype=np.intp).reshape([-1 if i == j else 1 for j in range(len(sizes))])
+                for i, (name, size) in enumerate(zip(self.inputs, sizes))}
+
+        for f in self.functions:
+            out = f.table[tuple(grid[name] for name in f.inputs)]
+
+            if np.any(out == NO_RULE):
+                raise Exception("Wrong number of rules executed [] for rule %s" % f.name)
+            grid[f.name] = out
+
+        self.flat_table = np.ascontiguousarray(np.broadcast_to(grid[self.output], sizes))
+
+        return self.flat_table
+
+    def evaluate_flat(self, data):
+        """
+        Output codes of a batch of alternatives from the flattened table (:meth:`flatten`).
+
+        :param data: Values of the input attributes by attribute name (DataFrame or dict of arrays).
+        :return: int8 codes of the output attribute.
+        :rtype: numpy.ndarray
+        """
+        if self.flat_table is None:
+            self.flatten()
+
+        codes = self.encode(data)
+
+        return self.flat_table[tuple(codes[name] for name in self.inputs)]
@@ -3,6 +3,8 @@
 # Repository: https://repo.ijs.si/bmileva/dexpy/-/tree/gini/dex?ref_type=heads
 # Accessed on: 12.01.2022.
 
+from DEX.compiled import CompiledModel
+
 # === START OF THIRD-PARTY CODE ===
 from DEX.components import *
 from DEX.qq_function import DEXFunctionQQ
@@ -217,4 +219,14 @@ class DEXModel:
             changes.append(value)
 
         return changes
-# === END OF THIRD-PARTY CODE ===
\ No newline at end of file
+# === END OF THIRD-PARTY CODE ===
+
+    def compile(self):
+        """
+        Compile all utility functions to dense tables indexed by the codes of the input values,
+        for the evaluation of many alternatives at once.
+
+        :return: The compiled model.
+        :rtype: :class:`DEX.compiled.CompiledModel`
+        """
+        return CompiledModel(self)
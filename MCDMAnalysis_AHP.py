@@ -1,23 +1,15 @@
 import pandas as pd
 import os
 import numpy as np
+import functools
+import copy
 
-#Names of the criteria
-col_available_positions = 'Available positions'
-col_skp_vs_esco = 'SKPvsESCO'
-col_languages = 'Languages'
-col_driving_license = 'Driving license'
-col_age = 'Age appropriateness'
-col_disability = 'Disability appropriateness'
-col_skp_wish = 'SKP Wish'
-col_js_contract_wish = 'JS wishes for contract type'
-col_job_contract = 'Job contract type'
-col_js_career = 'JS career wishes'
-col_job_advancement = 'Job career advancement'
-col_job_hours = 'Job working hours'
-col_js_hours = 'JS working hours wishes'
-col_distance = 'Distance to job position'
-col_location = 'JS wish location'
+from MCDMAnalysis_Codebook import (col_available_positions, col_skp_vs_esco, col_languages, col_driving_license,
+                                   col_age, col_disability, col_skp_wish, col_js_contract_wish, col_job_contract,
+                                   col_js_career, col_job_advancement, col_job_hours, col_js_hours, col_distance,
+                                   col_location, columns, LoadSKPDataFrame, EncodeValues)
+from MCDMAnalysis_ResultStore import ResultStore, GetResultStorePath, RankScores
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogData, LogRanking, SetVerbosity
 
 class TreeNode:
     def __init__(self, code, name, weight, score):
@@ -120,159 +112,321 @@ def calculate_criteria_relative_values():
     CritRV = get_leaf_scores(root)
     return CritRV
 
-def AHPReplaceValues(Alternatives: pd.DataFrame):
-    # Replace qualitative values with quantitative
-    # In the Excel file (AHPQuantVal.xlsx) it is explained how are quantitative values calculated
-
-    map_three = {'small': 0.06096, 'medium': 0.21577, 'large': 0.72327}
-    map_competences = {'>10': 0.06096, '5 - 10': 0.21577, '< 5 new competences': 0.72327}
-    map_yes_no = {'no': 0.09955, 'yes': 0.90045}
-    map_part_full = {'part time': 0.06096, 'full time': 0.21577, 'not important': 0.72327}
-    map_contract = {'part time': 0.09955, 'full time': 0.90045}
-    map_career = {'downgrade': 0.04767, 'same': 0.10841, 'not important': 0.25835, 'upgrade career': 0.58558}
-    map_advancement = {'down': 0.06096, 'same': 0.21577, 'up': 0.72327}
-    map_hours = {'daily/night shift': 0.04767, 'two-shift': 0.10841, 'afternoon shift': 0.25835, 'morning shift': 0.58558}
-    map_distance = {'> 20 km': 0.06096, '10 - 20 km': 0.21577, '< 10 km': 0.72327}
-
-    #map_three = {'small': 0.16328, 'medium': 0.29742, 'large': 0.53929}
-    #map_competences = {'>10': 0.16328, '5 - 10': 0.29742, '< 5 new competences': 0.53929}
-    #map_yes_no = {'no': 0.33333, 'yes': 0.66667}
-    #map_part_full = {'part time': 0.16328, 'full time': 0.29742, 'not important': 0.53929}
-    #map_contract = {'part time': 0.33333, 'full time': 0.66667}
-    #map_career = {'downgrade': 0.06726, 'same': 0.13946, 'not important': 0.27666, 'upgrade career': 0.51662}
-    #map_advancement = {'down': 0.16328, 'same': 0.29742, 'up': 0.53929}
-    #map_hours = {'daily/night shift': 0.06726, 'two-shift': 0.13946, 'afternoon shift': 0.27666, 'morning shift': 0.51662}
-    #map_distance = {'> 20 km': 0.16328, '10 - 20 km': 0.29742, '< 10 km': 0.53929}
-
-    replacement_maps = {
-        col_available_positions: map_three,
-        col_skp_vs_esco: map_competences,
-        col_languages: map_yes_no,
-        col_driving_license: map_yes_no,
-        col_age: map_yes_no,
-        col_disability: map_yes_no,
-        col_skp_wish: map_yes_no,
-        col_js_contract_wish: map_part_full,
-        col_job_contract: map_contract,
-        col_js_career: map_career,
-        col_job_advancement: map_advancement,
-        col_job_hours: map_hours,
-        col_js_hours: map_hours,
-        col_distance: map_distance,
-        col_location: map_yes_no
-    }
-
-    pd.set_option('future.no_silent_downcasting', True)
-
-    for column, value_map in replacement_maps.items():
-        Alternatives[column] = Alternatives[column].replace(value_map)
-
-    return Alternatives
+# Quantitative values of the qualitative categories
+# In the Excel file (AHPQuantVal.xlsx) it is explained how are quantitative values calculated
+map_three = {'small': 0.06096, 'medium': 0.21577, 'large': 0.72327}
+map_competences = {'>10': 0.06096, '5 - 10': 0.21577, '< 5 new competences': 0.72327}
+map_yes_no = {'no': 0.09955, 'yes': 0.90045}
+map_part_full = {'part time': 0.06096, 'full time': 0.21577, 'not important': 0.72327}
+map_contract = {'part time': 0.09955, 'full time': 0.90045}
+map_career = {'downgrade': 0.04767, 'same': 0.10841, 'not important': 0.25835, 'upgrade career': 0.58558}
+map_advancement = {'down': 0.06096, 'same': 0.21577, 'up': 0.72327}
+map_hours = {'daily/night shift': 0.04767, 'two-shift': 0.10841, 'afternoon shift': 0.25835, 'morning shift': 0.58558}
+map_distance = {'> 20 km': 0.06096, '10 - 20 km': 0.21577, '< 10 km': 0.72327}
+
+#map_three = {'small': 0.16328, 'medium': 0.29742, 'large': 0.53929}
+#map_competences = {'>10': 0.16328, '5 - 10': 0.29742, '< 5 new competences': 0.53929}
+#map_yes_no = {'no': 0.33333, 'yes': 0.66667}
+#map_part_full = {'part time': 0.16328, 'full time': 0.29742, 'not important': 0.53929}
+#map_contract = {'part time': 0.33333, 'full time': 0.66667}
+#map_career = {'downgrade': 0.06726, 'same': 0.13946, 'not important': 0.27666, 'upgrade career': 0.51662}
+#map_advancement = {'down': 0.16328, 'same': 0.29742, 'up': 0.53929}
+#map_hours = {'daily/night shift': 0.06726, 'two-shift': 0.13946, 'afternoon shift': 0.27666, 'morning shift': 0.51662}
+#map_distance = {'> 20 km': 0.16328, '10 - 20 km': 0.29742, '< 10 km': 0.53929}
+
+replacement_maps = {
+    col_available_positions: map_three,
+    col_skp_vs_esco: map_competences,
+    col_languages: map_yes_no,
+    col_driving_license: map_yes_no,
+    col_age: map_yes_no,
+    col_disability: map_yes_no,
+    col_skp_wish: map_yes_no,
+    col_js_contract_wish: map_part_full,
+    col_job_contract: map_contract,
+    col_js_career: map_career,
+    col_job_advancement: map_advancement,
+    col_job_hours: map_hours,
+    col_js_hours: map_hours,
+    col_distance: map_distance,
+    col_location: map_yes_no
+}
+
+def AHPReplaceValues(Alternatives: pd.DataFrame, dtype=np.float64, value_maps=replacement_maps):
+    # Replace qualitative values with quantitative (replacement_maps), Alternatives are not changed
+    # (float32 halves the memory of large datasets, the scores then differ in the last digits)
+    # Values regenerated from the preference matrices: value_maps=GetAHPValueMaps(method=AVERAGE, decimals=5) of
+    # MCDMAnalysis_AHPPriorities.py (the hard-coded replacement_maps, the default EIGENVECTOR method gives other values)
+    return pd.DataFrame(EncodeValues(Alternatives, value_maps, dtype),
+                        index=Alternatives.index, columns=columns, copy=False)
+
+def get_leaf_names(node):
+    if not node.children:
+        return [node.name]
+    names = []
+    for child in node.children:
+        names.extend(get_leaf_names(child))
+    return names
+
+class AHPEngine:
+    """
+    AHP scoring with the criteria hierarchy compiled once into the vector of leaf weights (CritRV).
+
+    Score of an alternative is the sum of weight * (weight * value) / (max of weight * value of the criterion),
+    computed on one buffer with the same operations and the same order of the row sum as the DataFrame version.
+
+    :param dict structure: Criteria hierarchy (criteria_structure), the leaves are the criteria.
+    """
+    def __init__(self, structure):
+        root = build_tree(structure, parent_score=1.0)
+        self.weights = np.array(get_leaf_scores(root), dtype=np.float64)
+        self.criteria = get_leaf_names(root)
+
+    def column_max(self, values):
+        # Max of the weighted values of each criterion (weighting keeps the order, so it is max value * weight)
+        values = np.asarray(values)
+        return np.max(values, axis=0) * self.weights.astype(values.dtype)
+
+    def score(self, values, max_weighted=None):
+        """AHP scores of the alternatives, values are not changed.
+
+        :param values: Quantitative values (alternatives x criteria, order of self.criteria), float32 or float64.
+        :param max_weighted: Max weighted value of each criterion (e.g. from a pre-pass over the whole dataset),
+            None to take it from values.
+        :return: Scores (alternatives) with the dtype of values.
+        """
+        values = np.asarray(values)
+        dtype = values.dtype if np.issubdtype(values.dtype, np.floating) else np.float64
+        weights = self.weights.astype(dtype)
+
+        if max_weighted is None:
+            max_weighted = self.column_max(values) if len(values) else np.zeros(len(weights), dtype=dtype)
+
+        # Criteria with max 0 (or no max) add 0
+        valid = (max_weighted != 0) & pd.notnull(max_weighted)
+
+        # F-ordered buffer, so the row sum adds the criteria one after another like DataFrame.sum
+        weighted = np.multiply(values, weights, dtype=dtype, order='F')
+        weighted /= np.where(valid, max_weighted, 1).astype(dtype)
+        weighted *= np.where(valid, weights, 0).astype(dtype)
+
+        return weighted.sum(axis=1)
+
+@functools.lru_cache(maxsize=None)
+def GetAHPEngine():
+    # AHP engine of criteria_structure, compiled on the first call (call GetAHPEngine.cache_clear() after changing it)
+    return AHPEngine(criteria_structure)
+
+def find_node(node_dict, code):
+    if node_dict.get("code") == code:
+        return node_dict
+    for child_dict in node_dict.get("children", []):
+        found = find_node(child_dict, code)
+        if found is not None:
+            return found
+    return None
+
+def NormaliseValues(values, dtype=np.float64):
+    # Values divided by the max value of each criterion (criteria with max 0 are 0), AHP score = result @ CritRV
+    values = np.asarray(values, dtype=dtype)
+    max_values = np.max(values, axis=0) if len(values) else np.zeros(values.shape[1], dtype=dtype)
+    valid = (max_values != 0) & pd.notnull(max_values)
+
+    return np.multiply(values, np.where(valid, 1 / np.where(valid, max_values, 1), 0).astype(dtype), order='F')
+
+def ProfileStructure(weights, structure=criteria_structure):
+    # Copy of the criteria hierarchy with other local weights (in %) of some nodes, by node code
+    profile = copy.deepcopy(structure)
+
+    for code, weight in weights.items():
+        node = find_node(profile, code)
+        if node is None:
+            raise ValueError("Criteria hierarchy has no node %s" % code)
+        node["weight"] = weight
+
+    return profile
+
+# Job profiles: criteria hierarchies with their own weights, all scored together by GetAHPProfileRankingResults
+# AHP_DEXiNormalised has the normalised local weights (Loc.norm.) from the (dexi weights.txt) file
+ahp_profiles = {
+    'AHP': criteria_structure,
+    'AHP_DEXiNormalised': ProfileStructure({
+        "2.1": 38.30, "2.2": 31.91, "2.3": 29.79,
+        "2.3.1": 40.00, "2.3.1.1": 60.00, "2.3.1.2": 40.00,
+        "2.3.2": 30.00, "2.3.2.1": 50.00, "2.3.2.2": 50.00,
+        "2.3.3": 30.00, "2.3.3.1": 81.82, "2.3.3.2": 18.18
+    })
+}
+
+def GetAHPProfileScores(values, structures, dtype=np.float64):
+    """AHP scores of the same alternatives for several criteria hierarchies in one batch.
+
+    :param values: Quantitative values (alternatives x criteria, order of the hierarchy leaves).
+    :param list structures: Criteria hierarchies (profiles) with the same leaves.
+    :return: Scores (profiles x alternatives), same as GetAHPRankingResults per profile up to the last digits.
+    """
+    engines = [AHPEngine(structure) for structure in structures]
+
+    for engine in engines[1:]:
+        if engine.criteria != engines[0].criteria:
+            raise ValueError("Criteria hierarchies of the profiles have different leaves")
+
+    # Leaf weights of all profiles (profiles x criteria) times the shared normalised values
+    weights = np.stack([engine.weights for engine in engines]).astype(dtype)
+
+    return weights @ NormaliseValues(values, dtype).T
+
+class AHPIncrementalScores:
+    """
+    AHP scores which follow changes of the node weights of the criteria hierarchy without a full recompute.
+
+    AHP score is linear in the leaf weights, score = N @ CritRV where N are the values divided by the max value
+    of each criterion. N is computed once. A change of node weights changes only the leaves below the changed
+    nodes, so the scores get a low-rank update along those columns of N.
+    Updated scores can differ from a full recompute in the last digits, refresh() recomputes them.
+
+    :param values: Quantitative values (alternatives x criteria, order of the hierarchy leaves).
+    :param dict structure: Criteria hierarchy, a copy is kept and changed by set_weights.
+    :param index: IDs of the alternatives.
+    :param dtype: Data type of N and the scores (float32 halves the memory).
+    :param int decimals: Scores are rounded to this number of decimals for ranking, so alternatives with equal
+        scores share the place no matter in which order their contributions were added.
+    """
+    def __init__(self, values, structure=criteria_structure, index=None, dtype=np.float64, decimals=10):
+        self.structure = copy.deepcopy(structure)
+        self.decimals = decimals
+        self.weights = AHPEngine(self.structure).weights
+        self.index = index
+
+        self.normalised = NormaliseValues(values, dtype)
+        self.refresh()
+
+    def refresh(self):
+        # Full recompute of the scores from N and the current leaf weights
+        self.scores = self.normalised @ self.weights.astype(self.normalised.dtype)
+        self.__ranks = None
+
+    def set_weights(self, weights):
+        """Change local weights of hierarchy nodes and update the scores.
+
+        :param dict weights: New local weight (in %) by node code, e.g. {'2.3.2.1.1': 50, '2.3.2.1.2': 50}.
+        :return: Positions of the criteria whose leaf weights changed.
+        """
+        # All codes are checked and the weights are computed on a copy, so an error changes nothing
+        unknown = [code for code in weights if find_node(self.structure, code) is None]
+        if unknown:
+            raise ValueError("Criteria hierarchy has no nodes %s" % unknown)
+
+        structure = copy.deepcopy(self.structure)
+        for code, weight in weights.items():
+            find_node(structure, code)["weight"] = weight
+
+        new_weights = AHPEngine(structure).weights
+        self.structure = structure
+        changed = np.flatnonzero(new_weights != self.weights)
+
+        if changed.size:
+            delta = (new_weights[changed] - self.weights[changed]).astype(self.normalised.dtype)
+            self.scores += self.normalised[:, changed] @ delta
+            self.__ranks = None
+
+        self.weights = new_weights
+
+        return changed
+
+    @property
+    def ranks(self):
+        # Ranking places of the current scores (computed once per update)
+        if self.__ranks is None:
+            self.__ranks = RankScores(np.round(self.scores, self.decimals))
+        return self.__ranks
+
+    def to_frame(self):
+        return pd.DataFrame({'AHP': self.scores, 'Rank': self.ranks}, index=self.index)
 
 def GetAHPRankingResults(AlterAHP: pd.DataFrame):
     np.set_printoptions(precision=8)
 
     # Criteria local values are taken from the (dexi weights.txt) file and all are divided by 100.
     # Values which belong to each hierarchical node are multiplied with the criteria value of that node.
-    CritRV = calculate_criteria_relative_values()
-
-    print('Criteria relative values')
-    print(CritRV)
-    print('-' * 58)
-
-    #Calculate weighted matrix
-    columns = [
-        col_available_positions,
-        col_skp_vs_esco,
-        col_languages,
-        col_driving_license,
-        col_age,
-        col_disability,
-        col_skp_wish,
-        col_js_contract_wish,
-        col_job_contract,
-        col_js_career,
-        col_job_advancement,
-        col_job_hours,
-        col_js_hours,
-        col_distance,
-        col_location
-    ]
+    engine = GetAHPEngine()
 
-    for col, weight in zip(columns, CritRV):
-        AlterAHP[col] = AlterAHP[col].multiply(weight)
-
-    # Print the weighted matrix
-    print('Weighted matrix:')
-    print(AlterAHP)
-    print('-' * 58)
-
-    #Determine the max value for each criterion
-    AlterMaxValues = AlterAHP.max()
-
-    print('Maximum value of the alternatives for each criterion.')
-    print(AlterMaxValues)
-    print('-' * 58)
-
-    #Divide values by the max value of each criterion and multiply by criterion value
-    columns = [
-        col_available_positions,
-        col_skp_vs_esco,
-        col_languages,
-        col_driving_license,
-        col_age,
-        col_disability,
-        col_skp_wish,
-        col_js_contract_wish,
-        col_job_contract,
-        col_js_career,
-        col_job_advancement,
-        col_job_hours,
-        col_js_hours,
-        col_distance,
-        col_location
-    ]
+    LogData('Criteria relative values', engine.weights)
 
-    for col, weight in zip(columns, CritRV):
-        max_val = AlterMaxValues[col]
-        if max_val != 0 and pd.notnull(max_val):
-            AlterAHP[col] = AlterAHP[col].divide(max_val).multiply(weight)
-        else:
-            AlterAHP[col] = 0
+    # Criteria in the order of the hierarchy leaves (no copy when the columns are already in that order)
+    if list(AlterAHP.columns) != engine.criteria:
+        AlterAHP = AlterAHP[engine.criteria]
+    values = AlterAHP.to_numpy()
+
+    #Determine the max weighted value for each criterion
+    AlterMaxValues = engine.column_max(values)
 
-    row_sums = AlterAHP.sum(axis=1)
+    LogData('Maximum value of the alternatives for each criterion.', pd.Series(AlterMaxValues, index=engine.criteria))
 
-    AlterRankingsAHP_df = row_sums.to_frame('AHP')
+    #Divide weighted values by the max value of each criterion, multiply by criterion value and sum
+    row_sums = engine.score(values, AlterMaxValues)
+
+    AlterRankingsAHP_df = pd.DataFrame(row_sums, index=AlterAHP.index, columns=['AHP'])
 
     return AlterRankingsAHP_df
 
-filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
-#filename = 'TotalSKPData.csv'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+def GetAHPProfileRankingResults(AlterAHP: pd.DataFrame, profiles=ahp_profiles):
+    # AHP scores of all profiles (one column per profile), the alternatives are shared by all profiles
+    criteria = AHPEngine(next(iter(profiles.values()))).criteria
+    if list(AlterAHP.columns) != criteria:
+        AlterAHP = AlterAHP[criteria]
+
+    scores = GetAHPProfileScores(AlterAHP.to_numpy(), list(profiles.values()))
+
+    AlterRankingsProfiles_df = pd.DataFrame(scores.T, index=AlterAHP.index, columns=list(profiles.keys()))
+
+    return AlterRankingsProfiles_df
+
+def main():
+    filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
+    #filename = 'TotalSKPData.skp'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+
+    verbosity = 'summary'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
+
+    directory = './Results'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    if filename.endswith('.skp'):
+        TotalSKPData_df = LoadSKPDataFrame('./' + filename)
+    else:
+        TotalSKPData_df = pd.read_csv('./'+filename, index_col=0, delimiter=';')
+
+    LogData("TotalSKPData dataframe:", TotalSKPData_df)
+
+    # AHP Ranking
+    LogMessage("AHP RANKING:")
+    LogSeparator()
+
+    TotalSKPData_RepVal = AHPReplaceValues(TotalSKPData_df)
+    LogData("TotalSKPData Criteria categories values dataframe:", TotalSKPData_RepVal)
 
-directory = './Results'
-if not os.path.exists(directory):
-    os.makedirs(directory)
+    AHPRanking_df = GetAHPRankingResults(TotalSKPData_RepVal)
 
-TotalSKPData_df = pd.read_csv('./'+filename, index_col=0, delimiter=';')
+    # Print final ranking
+    LogRanking('AHP final ranking results:', AHPRanking_df)
 
-print("TotalSKPData dataframe:")
-print(TotalSKPData_df)
-print('-' * 58)
+    AHPRanking_df.to_csv(directory + '/AHP_Results.csv', sep=';', index=True, header=True)
 
-# AHP Ranking
-print("AHP RANKING:")
-print('-' * 58)
+    results = ResultStore(GetResultStorePath(directory, filename), ids=AHPRanking_df.index)
+    results.write('AHP', AHPRanking_df['AHP'], {'CritRV': calculate_criteria_relative_values(), 'values': replacement_maps})
 
-TotalSKPData_RepVal = AHPReplaceValues(TotalSKPData_df)
-print("TotalSKPData Criteria categories values dataframe:")
-print(TotalSKPData_RepVal)
-print('-' * 58)
+    # Scores of the other job profiles, all profiles in one batch
+    profiles = {name: structure for name, structure in ahp_profiles.items() if name != 'AHP'}
 
-AHPRanking_df = GetAHPRankingResults(TotalSKPData_RepVal)
+    if profiles:
+        AHPProfiles_df = GetAHPProfileRankingResults(TotalSKPData_RepVal, profiles)
+        LogData('AHP ranking results of the job profiles:', AHPProfiles_df)
 
-# Print final ranking
-print('AHP final ranking results:')
-print(AHPRanking_df)
-print('-' * 58)
+        for name, structure in profiles.items():
+            results.write(name, AHPProfiles_df[name], {'CritRV': AHPEngine(structure).weights,
+                                                       'values': replacement_maps})
 
-AHPRanking_df.to_csv(directory + '/AHP_Results.csv', sep=';', index=True, header=True)
\ No newline at end of file
+if __name__ == '__main__':
+    main()
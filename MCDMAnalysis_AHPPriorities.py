@@ -0,0 +1,230 @@
+#Priorities and consistency ratios of the AHP preference matrices (AHPCriteriaScale) and the criteria hierarchy nodes
+#Run this code to regenerate the quantitative values of the categories (replacement_maps of MCDMAnalysis_AHP.py)
+import pandas as pd
+import numpy as np
+import os
+import copy
+import time
+import functools
+import json
+
+from MCDMAnalysis_Codebook import columns, criteria_levels
+from MCDMAnalysis_AHP import criteria_structure, replacement_maps, AHPEngine, AHPReplaceValues, GetAHPRankingResults
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogData, SetVerbosity
+
+#Preference matrices of the criteria (C1..C15 in the order of the columns) and of the hierarchy nodes (node code)
+scale_directory = './AHPCriteriaScale'
+scale_file = 'AHP Preference scale %s.csv'
+
+#Saaty's random consistency index for the matrix size
+random_index = {1: 0.0, 2: 0.0, 3: 0.58, 4: 0.90, 5: 1.12, 6: 1.24, 7: 1.32, 8: 1.41, 9: 1.45, 10: 1.49}
+
+#Priority methods: principal eigenvector or the average of the normalised columns (used in AHPQuantVal.xlsx)
+EIGENVECTOR = 'eigenvector'
+AVERAGE = 'average'
+
+
+def criterion_file(directory, i):
+    return os.path.join(directory, scale_file % ('C%d' % i))
+
+
+def node_file(directory, node):
+    return os.path.join(directory, scale_file % (node.get('code') or 'root'))
+
+
+def LoadPreferenceMatrices(directory=scale_directory):
+    # Preference matrix of every criterion, rows and columns are the categories in the codebook order
+    matrices = {}
+
+    for i, col in enumerate(columns, 1):
+        df = pd.read_csv(criterion_file(directory, i), index_col=0, delimiter=';')
+        if df.shape != (len(criteria_levels[col]), len(criteria_levels[col])):
+            raise ValueError("Preference matrix C%d %s does not match the categories of %s" % (i, df.shape, col))
+        matrices[col] = df.to_numpy(dtype=np.float64)
+
+    return matrices
+
+
+def inner_nodes(node):
+    if node.get('children'):
+        yield node
+        for child in node['children']:
+            yield from inner_nodes(child)
+
+
+def NodeMatrices(structure=criteria_structure, directory=scale_directory):
+    """Preference matrix of the children of every inner node of the criteria hierarchy.
+
+    The matrix is read from 'AHP Preference scale <node code>.csv' ('root' for the root node) when the file exists,
+    otherwise it is the consistent matrix of the local weights (w_i / w_j) of the children.
+
+    Returns:
+        dict: (child names, matrix) of every inner node by node code.
+    """
+    matrices = {}
+
+    for node in inner_nodes(structure):
+        names = [child['name'] for child in node['children']]
+
+        if os.path.isfile(node_file(directory, node)):
+            matrix = pd.read_csv(node_file(directory, node), index_col=0, delimiter=';').to_numpy(dtype=np.float64)
+            if matrix.shape != (len(names), len(names)):
+                raise ValueError("Preference matrix of node %s does not match its %d children" % (node.get('code'),
+                                                                                                 len(names)))
+        else:
+            weights = np.array([child['weight'] for child in node['children']], dtype=np.float64)
+            matrix = weights[:, None] / weights[None, :]
+
+        matrices[node.get('code') or 'root'] = (names, matrix)
+
+    return matrices
+
+
+def SolvePriorities(matrices, method=EIGENVECTOR):
+    """Priorities and consistency of many preference matrices at once.
+
+    Matrices of the same size are stacked and solved with one batched eigenvalue computation.
+
+    Args:
+        matrices (list): Square positive reciprocal matrices.
+        method (str): EIGENVECTOR (principal eigenvector) or AVERAGE (average of the normalised columns).
+
+    Returns:
+        tuple: (list of priority vectors (sum 1), array of the principal eigenvalues, array of the consistency ratios).
+    """
+    priorities = [None] * len(matrices)
+    lambda_max = np.zeros(len(matrices))
+
+    sizes = np.array([len(matrix) for matrix in matrices])
+
+    for size in np.unique(sizes):
+        ind = np.flatnonzero(sizes == size)
+        stack = np.stack([matrices[i] for i in ind])
+
+        values, vectors = np.linalg.eig(stack)
+        principal = np.argmax(values.real, axis=1)
+        lambda_max[ind] = values.real[np.arange(len(ind)), principal]
+
+        if method == EIGENVECTOR:
+            # Perron vector of a positive matrix has all components of the same sign
+            vectors = np.abs(vectors.real[np.arange(len(ind)), :, principal])
+        elif method == AVERAGE:
+            vectors = np.mean(stack / np.sum(stack, axis=1, keepdims=True), axis=2)
+        else:
+            raise ValueError("Unknown priority method %s" % method)
+
+        vectors /= np.sum(vectors, axis=1, keepdims=True)
+
+        for k, i in enumerate(ind):
+            priorities[i] = vectors[k]
+
+    # Consistency index and ratio (matrices up to size 2 are always consistent)
+    ci = np.where(sizes > 1, np.maximum(lambda_max - sizes, 0) / np.maximum(sizes - 1, 1), 0)
+    ri = np.array([random_index.get(size, random_index[10]) for size in sizes])
+    cr = np.divide(ci, ri, out=np.zeros(len(matrices)), where=ri > 0)
+
+    return priorities, lambda_max, cr
+
+
+def SolveAll(structure=criteria_structure, directory=scale_directory, method=EIGENVECTOR):
+    """Priorities of all criteria preference matrices and all hierarchy nodes in one computation.
+
+    Returns:
+        tuple: (category values of every criterion, local weights (in %) of the children of every node,
+        DataFrame with the size, principal eigenvalue and consistency ratio of every matrix).
+    """
+    criteria = LoadPreferenceMatrices(directory)
+    nodes = NodeMatrices(structure, directory)
+
+    names = list(criteria.keys()) + ['node ' + code for code in nodes]
+    matrices = list(criteria.values()) + [matrix for children, matrix in nodes.values()]
+
+    priorities, lambda_max, cr = SolvePriorities(matrices, method)
+
+    value_maps = {col: dict(zip(criteria_levels[col], priority)) for col, priority in zip(criteria, priorities)}
+    node_weights = {code: dict(zip(children, priority * 100))
+                    for (code, (children, matrix)), priority in zip(nodes.items(), priorities[len(criteria):])}
+
+    consistency_df = pd.DataFrame({'size': [len(matrix) for matrix in matrices], 'lambda max': lambda_max, 'CR': cr},
+                                  index=names)
+
+    return value_maps, node_weights, consistency_df
+
+
+def structure_key(structure):
+    return json.dumps(structure, sort_keys=True)
+
+
+def stamp(directory):
+    # Modification times of the preference matrix files (a changed file invalidates the cached priorities)
+    files = sorted(f for f in os.listdir(directory) if f.endswith('.csv'))
+    return tuple((f, os.stat(os.path.join(directory, f)).st_mtime_ns) for f in files)
+
+
+@functools.lru_cache(maxsize=16)
+def cached_solve(structure_key, directory, method, decimals, file_stamp):
+    # structure_key is the JSON text of the criteria hierarchy (the hierarchy itself is not hashable)
+    value_maps, node_weights, consistency_df = SolveAll(json.loads(structure_key), directory, method)
+
+    if decimals is not None:
+        value_maps = {col: {level: round(float(value), decimals) for level, value in values.items()}
+                      for col, values in value_maps.items()}
+
+    return value_maps, node_weights, consistency_df
+
+
+def GetAHPValueMaps(directory=scale_directory, method=EIGENVECTOR, decimals=None):
+    """Quantitative values of the categories of every criterion (same form as replacement_maps).
+
+    Values are cached and only computed again when a preference matrix file changes.
+    AVERAGE with 5 decimals gives the values of AHPQuantVal.xlsx, which are hard-coded in MCDMAnalysis_AHP.py.
+    """
+    return cached_solve(structure_key(criteria_structure), directory, method, decimals, stamp(directory))[0]
+
+
+def DerivedCriteriaStructure(structure=criteria_structure, directory=scale_directory, method=EIGENVECTOR):
+    # Copy of the criteria hierarchy with the local weights of the node preference matrices
+    node_weights = cached_solve(structure_key(structure), directory, method, None, stamp(directory))[1]
+    derived = copy.deepcopy(structure)
+
+    for node in inner_nodes(derived):
+        for child in node['children']:
+            child['weight'] = float(node_weights[node.get('code') or 'root'][child['name']])
+
+    return derived
+
+
+def main():
+    filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
+
+    verbosity = 'full'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
+
+    for method in [EIGENVECTOR, AVERAGE]:
+        start = time.perf_counter()
+        value_maps, node_weights, consistency_df = SolveAll(criteria_structure, scale_directory, method)
+        duration = time.perf_counter() - start
+
+        LogMessage('Priorities (' + method + ') of all preference matrices computed in %.1f ms' % (duration * 1000))
+        LogSeparator()
+        LogData('Consistency of the preference matrices:', consistency_df)
+
+        values_df = pd.DataFrame([[level, value, replacement_maps[col][level]]
+                                  for col, values in value_maps.items() for level, value in values.items()],
+                                 columns=['category', method, 'hard-coded'],
+                                 index=[col for col, values in value_maps.items() for level in values])
+        LogData('Values of the categories and the hard-coded values of MCDMAnalysis_AHP.py:', values_df)
+
+    # AHP ranking with the values regenerated from the preference matrices
+    TotalSKPData_df = pd.read_csv('./' + filename, index_col=0, delimiter=';')
+
+    value_maps = GetAHPValueMaps(method=AVERAGE, decimals=5)
+    AHPRanking_df = GetAHPRankingResults(AHPReplaceValues(TotalSKPData_df, value_maps=value_maps))
+    LogData('AHP ranking results with the regenerated values:', AHPRanking_df)
+
+    # Leaf weights of the hierarchy with the weights of the node preference matrices
+    LogData('Criteria relative values of the node preference matrices:', AHPEngine(DerivedCriteriaStructure()).weights)
+
+
+if __name__ == '__main__':
+    main()
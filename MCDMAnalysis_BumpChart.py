@@ -3,6 +3,8 @@ import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from MCDMAnalysis_ResultStore import ResultStore
+
 #def CreateBumpChart(DEX_df, AHP_df, TOPSIS_df, PROMETHEE_df, PAPRIKA_df: pd.DataFrame, path, name, count, size):
 def CreateBumpChart(DEX_df, AHP_df, TOPSIS_df, PROMETHEE_df, PAPRIKA_df):
     DEXRankingScores_desc = DEX_df.sort_values(by='DEX', ascending=False)
@@ -127,10 +129,22 @@ TOPSISRanking = 'TOPSIS_Results.csv'
 PROMETHEERanking = 'PROMETHEE_Results.csv'
 PAPRIKARanking = 'PAPRIKA_Results.csv'
 
-DEXRanking_df = pd.read_csv('./Results/' + DEXRanking, index_col=0, delimiter=';')
-AHPRanking_df = pd.read_csv('./Results/' + AHPRanking, index_col=0, delimiter=';')
-TOPSISRanking_df = pd.read_csv('./Results/' + TOPSISRanking, index_col=0, delimiter=';')
-PROMETHEERanking_df = pd.read_csv('./Results/' + PROMETHEERanking, index_col=0, delimiter=';')
-PAPRIKARanking_df = pd.read_csv('./Results/' + PAPRIKARanking, index_col=0, delimiter=';')
+# Or load all rankings from the result store written by the ranking scripts
+results_store = None
+#results_store = directory + '/AHP_test.results'
+
+if results_store is not None:
+    results = ResultStore(results_store)
+    DEXRanking_df = results.to_frame(['DEX'])
+    AHPRanking_df = results.to_frame(['AHP'])
+    TOPSISRanking_df = results.to_frame(['TOPSIS'])
+    PROMETHEERanking_df = results.to_frame(['PROMETHEE'])
+    PAPRIKARanking_df = results.to_frame(['PAPRIKA'])
+else:
+    DEXRanking_df = pd.read_csv('./Results/' + DEXRanking, index_col=0, delimiter=';')
+    AHPRanking_df = pd.read_csv('./Results/' + AHPRanking, index_col=0, delimiter=';')
+    TOPSISRanking_df = pd.read_csv('./Results/' + TOPSISRanking, index_col=0, delimiter=';')
+    PROMETHEERanking_df = pd.read_csv('./Results/' + PROMETHEERanking, index_col=0, delimiter=';')
+    PAPRIKARanking_df = pd.read_csv('./Results/' + PAPRIKARanking, index_col=0, delimiter=';')
 
 CreateBumpChart(DEXRanking_df, AHPRanking_df, TOPSISRanking_df, PROMETHEERanking_df, PAPRIKARanking_df)
\ No newline at end of file
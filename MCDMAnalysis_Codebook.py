@@ -0,0 +1,209 @@
+#Codebook of the SKP criteria and the columnar dataset format (int8 category codes + ID index)
+#Run this code to convert the CSV datasets into the columnar format
+import pandas as pd
+import numpy as np
+import os
+import json
+
+#Names of the criteria
+col_available_positions = 'Available positions'
+col_skp_vs_esco = 'SKPvsESCO'
+col_languages = 'Languages'
+col_driving_license = 'Driving license'
+col_age = 'Age appropriateness'
+col_disability = 'Disability appropriateness'
+col_skp_wish = 'SKP Wish'
+col_js_contract_wish = 'JS wishes for contract type'
+col_job_contract = 'Job contract type'
+col_js_career = 'JS career wishes'
+col_job_advancement = 'Job career advancement'
+col_job_hours = 'Job working hours'
+col_js_hours = 'JS working hours wishes'
+col_distance = 'Distance to job position'
+col_location = 'JS wish location'
+
+#Categories of the criteria ordered from the least to the most valuable one
+#Category code of a criterion is the position of the category in its list
+criteria_levels = {
+    col_available_positions: ['small', 'medium', 'large'],
+    col_skp_vs_esco: ['>10', '5 - 10', '< 5 new competences'],
+    col_languages: ['no', 'yes'],
+    col_driving_license: ['no', 'yes'],
+    col_age: ['no', 'yes'],
+    col_disability: ['no', 'yes'],
+    col_skp_wish: ['no', 'yes'],
+    col_js_contract_wish: ['part time', 'full time', 'not important'],
+    col_job_contract: ['part time', 'full time'],
+    col_js_career: ['downgrade', 'same', 'not important', 'upgrade career'],
+    col_job_advancement: ['down', 'same', 'up'],
+    col_job_hours: ['daily/night shift', 'two-shift', 'afternoon shift', 'morning shift'],
+    col_js_hours: ['daily/night shift', 'two-shift', 'afternoon shift', 'morning shift'],
+    col_distance: ['> 20 km', '10 - 20 km', '< 10 km'],
+    col_location: ['no', 'yes']
+}
+
+#Order of the criteria (columns) in all datasets
+columns = list(criteria_levels.keys())
+
+#Columnar dataset is a directory with these files
+codes_file = 'codes.npy'  # int8 category codes, one contiguous row per criterion (criteria x alternatives)
+ids_file = 'ids.npy'  # IDs of the alternatives (missing when IDs are row numbers)
+meta_file = 'meta.json'  # criteria, categories and the first row number
+
+
+def EncodeSKPData(Alternatives: pd.DataFrame):
+    """Encode the qualitative categories of the alternatives as category codes.
+
+    Args:
+        Alternatives (DataFrame): Alternatives with the criteria categories (strings).
+
+    Returns:
+        ndarray: int8 array (alternatives x criteria) of category codes.
+    """
+    codes = np.empty((len(Alternatives), len(columns)), dtype=np.int8)
+
+    for j, col in enumerate(columns):
+        cat = pd.Categorical(Alternatives[col], categories=criteria_levels[col])
+        if np.any(cat.codes < 0):
+            unknown = pd.unique(Alternatives[col][cat.codes < 0])
+            raise ValueError("Unknown categories %s for criterion %s" % (list(unknown), col))
+        codes[:, j] = cat.codes
+
+    return codes
+
+
+def DecodeSKPData(codes, index=None):
+    # Category codes (alternatives x criteria) back to a DataFrame of qualitative categories
+    return pd.DataFrame({col: pd.Categorical.from_codes(codes[:, j], categories=criteria_levels[col])
+                         for j, col in enumerate(columns)}, index=index)
+
+
+def ValueTables(value_maps, dtype=np.float32):
+    # Lookup table of every criterion with the quantitative value of each category code
+    return [np.array([value_maps[col][level] for level in criteria_levels[col]], dtype=dtype) for col in columns]
+
+
+def EncodeValues(Alternatives, value_maps, dtype=np.float32):
+    """Replace the criteria categories with quantitative values (one lookup table gather per criterion).
+
+    Args:
+        Alternatives (DataFrame|ndarray): Criteria categories (strings) or category codes of the alternatives.
+        value_maps (dict): Quantitative value of every category of every criterion (e.g. AHPReplaceValues maps).
+        dtype: Data type of the quantitative values.
+
+    Returns:
+        ndarray: New array (alternatives x criteria) of quantitative values, Alternatives are not changed.
+    """
+    if isinstance(Alternatives, pd.DataFrame):
+        if all(pd.api.types.is_integer_dtype(Alternatives[col]) for col in columns):
+            codes = Alternatives[columns].to_numpy()
+        else:
+            codes = EncodeSKPData(Alternatives)
+    else:
+        codes = np.asarray(Alternatives)
+
+    values = np.empty(codes.shape, dtype=dtype, order='F')
+
+    for j, table in enumerate(ValueTables(value_maps, dtype)):
+        col_codes = codes[:, j]
+        if col_codes.size and (col_codes.min() < 0 or col_codes.max() >= len(table)):
+            raise ValueError("Unknown category codes for criterion %s" % columns[j])
+        np.take(table, col_codes, out=values[:, j])
+
+    return values
+
+
+def CreateSKPDataset(path, n, ids=None, start=0):
+    """Create an empty columnar dataset for n alternatives.
+
+    Args:
+        path (str): Directory of the dataset.
+        n (int): Number of alternatives.
+        ids (array): IDs of the alternatives (None to use row numbers start, start + 1, ...).
+        start (int): Row number of the first alternative (when the dataset is a slice of a larger one).
+
+    Returns:
+        memmap: Writable int8 array (alternatives x criteria) of the category codes.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    with open(os.path.join(path, meta_file), 'w') as f:
+        json.dump({'columns': columns, 'levels': criteria_levels, 'rows': n, 'start': start}, f, indent=2)
+
+    if ids is not None:
+        if len(ids) != n:
+            raise ValueError("Number of IDs %d does not match number of alternatives %d" % (len(ids), n))
+        np.save(os.path.join(path, ids_file), np.asarray(ids).astype(str))
+    elif os.path.isfile(os.path.join(path, ids_file)):
+        os.remove(os.path.join(path, ids_file))
+
+    codes = np.lib.format.open_memmap(os.path.join(path, codes_file), mode='w+', dtype=np.int8,
+                                      shape=(len(columns), n))
+    return codes.T
+
+
+def WriteSKPDataset(path, codes, ids=None, start=0):
+    # Write category codes (alternatives x criteria) to a columnar dataset
+    out = CreateSKPDataset(path, codes.shape[0], ids, start)
+    out[:] = codes
+    out.flush()
+
+    return path
+
+
+def LoadSKPDataset(path):
+    """Load a columnar dataset (memory mapped, nothing is parsed or copied).
+
+    Returns:
+        tuple: (read only int8 array (alternatives x criteria) of category codes, index with the IDs).
+    """
+    with open(os.path.join(path, meta_file)) as f:
+        meta = json.load(f)
+
+    if meta['columns'] != columns or meta['levels'] != criteria_levels:
+        raise ValueError("Dataset %s was written with a different codebook" % path)
+
+    codes = np.load(os.path.join(path, codes_file), mmap_mode='r').T
+
+    if os.path.isfile(os.path.join(path, ids_file)):
+        index = pd.Index(np.load(os.path.join(path, ids_file), mmap_mode='r'))
+    else:
+        index = pd.RangeIndex(meta['start'], meta['start'] + meta['rows'])
+
+    return codes, index
+
+
+def LoadSKPDataFrame(path):
+    # Columnar dataset as a DataFrame of category codes (the form the *ReplaceValues functions accept)
+    codes, index = LoadSKPDataset(path)
+
+    return pd.DataFrame(codes, columns=columns, index=index, copy=False)
+
+
+def ConvertCSVToSKPDataset(filename, path, chunksize=100000):
+    # Convert a ';' delimited CSV dataset with the criteria categories to a columnar dataset
+    codes = []
+    ids = []
+
+    for chunk in pd.read_csv(filename, index_col=0, delimiter=';', chunksize=chunksize):
+        codes.append(EncodeSKPData(chunk))
+        ids.append(chunk.index.to_numpy())
+
+    codes = np.concatenate(codes) if codes else np.empty((0, len(columns)), dtype=np.int8)
+    ids = np.concatenate(ids) if ids else None
+
+    return WriteSKPDataset(path, codes, ids)
+
+
+def main():
+    filename = 'AHP_test.csv'  #convert test sample (this is small sample of data for testing purposes)
+
+    path = ConvertCSVToSKPDataset('./' + filename, './' + os.path.splitext(filename)[0] + '.skp')
+
+    codes, index = LoadSKPDataset(path)
+    print('Dataset with ' + str(codes.shape[0]) + ' alternatives is written to ' + path + ' successfully.')
+    print(DecodeSKPData(codes, index))
+
+
+if __name__ == '__main__':
+    main()
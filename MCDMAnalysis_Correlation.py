@@ -3,6 +3,8 @@ import os
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+from MCDMAnalysis_ResultStore import ResultStore
+
 def CalculateCorrelation(Rankings_df: pd.DataFrame, Method, Path, Name):
     correlation_matrix = Rankings_df.corr(method=Method)
 
@@ -102,10 +104,17 @@ ranking_files = {
     'PAPRIKA': 'PAPRIKA_Results.csv'
 }
 
+# Or load all rankings from the result store written by the ranking scripts
+results_store = None
+#results_store = directory + '/AHP_test.results'
+
 ranking_dfs = {}
 
 for method, filename in ranking_files.items():
-    df = pd.read_csv(directory + '/' + filename, index_col=0, delimiter=';')
+    if results_store is not None:
+        df = ResultStore(results_store).to_frame([method])
+    else:
+        df = pd.read_csv(directory + '/' + filename, index_col=0, delimiter=';')
     ranking_dfs[method] = df
     print(f'{method} Ranking results:')
     print(df)
@@ -6,7 +6,7 @@
 import pandas as pd
 import os
 import numpy as np
-import re
+import functools
 import matplotlib.pyplot as plt
 
 # === START OF THIRD-PARTY CODE ===
@@ -14,12 +14,27 @@ from DEX.dex import DEXModel
 from DEX.gini_population import DEXFunctionGiniPop
 # === END OF THIRD-PARTY CODE ===
 
-class MyDictionary(dict):
-    def add(self, key, value):
-        self[key] = value
+from MCDMAnalysis_ResultStore import ResultStore, GetResultStorePath
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogData, LogRanking, SetVerbosity
+
+#DEX model of the job position
+#dex_model_file = './DEX/SKP Evaluation version 3.xml'
+dex_model_file = './DEX/Job_positions_project_manager.xml'
+
+@functools.lru_cache(maxsize=4)
+def GetCompiledDEXModel(filename):
+    # Gini population DEX model compiled for batch evaluation (the model is read once per file)
+    # === START OF THIRD-PARTY CODE ===
+    dexmodel = DEXModel(filename, function_class=DEXFunctionGiniPop)
+    # === END OF THIRD-PARTY CODE ===
+
+    return dexmodel.compile()
+
+
+def printed_value(value):
+    # Value with the 8 decimals of the printed array of DEXModel.evaluate_model (used for the DEX scores)
+    return float(np.format_float_positional(value, precision=8))
 
-def sort_by_level(obj):
-    return obj.level
 
 def GetDEXRankingResults(AlterDEX: pd.DataFrame):
     # Extract the index as a NumPy array
@@ -27,17 +42,12 @@ def GetDEXRankingResults(AlterDEX: pd.DataFrame):
 
     AlterDEX['ID'] = AlterDEX.index
 
-    #Set 'ID' column as the index and transpose the DataFrame
-    result_dict = AlterDEX.set_index('ID').T.to_dict('list')
+    #Set 'ID' column as the index, every row holds the values of the input attributes
+    AlterValues = AlterDEX.set_index('ID')
 
-    print("Input dictionary for DEX ranking:")
-    print(result_dict)
-    print('-' * 58)
+    LogData("Input values for DEX ranking:", AlterValues)
 
     # === START OF THIRD-PARTY CODE ===
-    #dexmodel = DEXModel('./DEX/SKP Evaluation version 3.xml', function_class=DEXFunctionGiniPop)
-    dexmodel = DEXModel('./DEX/Job_positions_project_manager.xml', function_class=DEXFunctionGiniPop)
-
     #possible_attr = ['Available positions',
     #                 'SKPvsESCO',
     #                 'Languages',
@@ -74,44 +84,26 @@ def GetDEXRankingResults(AlterDEX: pd.DataFrame):
                      'Self-initiative',
                      'Type',
                      'Duration']
+    # === END OF THIRD-PARTY CODE ===
 
-    optim_space = list(result_dict.values())
-    data_optim = MyDictionary()
-
-    x = sorted(dexmodel.functions.values(), key=sort_by_level)
-    output_attribute = x[-1].name
-    RankingScores = np.empty((0, 1))
-    counter = 0
-
-    for row in optim_space:
-        for i in range(len(possible_attr)):
-            data_optim.add(possible_attr[i], row[i])
+    dexmodel = GetCompiledDEXModel(dex_model_file)
 
-        res = dexmodel.evaluate_model(data_optim)
+    # The i-th value of a row is the value of the i-th attribute of possible_attr
+    data = dict(zip(possible_attr, AlterValues.to_numpy().T))
 
-        RankingScores = np.append(RankingScores, res)
-    # === END OF THIRD-PARTY CODE ===
+    # All candidates are evaluated at once, level by level of the model
+    RankingScores = dexmodel.evaluate_qq(dexmodel.qq_matrix(data))[dexmodel.output]
 
-    print(RankingScores)
+    LogData('DEX model evaluation results:', RankingScores)
 
-    DEX_df = pd.DataFrame(RankingScores, index=index_array)
-    skp_series = DEX_df[0].apply(extract_skp_evaluation)
+    skp_series = pd.Series([printed_value(value) for value in RankingScores], index=index_array)
     AlterRankings_df = pd.DataFrame({"DEX": skp_series})
 
     # Print final ranking
-    print('DEX final ranking results:')
-    print(AlterRankings_df)
-    print('-' * 58)
+    LogRanking('DEX final ranking results:', AlterRankings_df)
 
     return AlterRankings_df
 
-def extract_skp_evaluation(text):
-    #match = re.search(r"'SKP Evaluation'\s*:\s*array\(\[([\d\.]+)\]\)", str(text))
-    match = re.search(r"'Job candidate'\s*:\s*array\(\[([\d\.]+)\]\)", str(text))
-    if match:
-        return float(match.group(1))
-    return None
-
 
 def plot_dex_barh(df, column="DEX", title="", save_path=None):
     values = df[column]
@@ -131,27 +123,35 @@ def plot_dex_barh(df, column="DEX", title="", save_path=None):
     plt.show()
 
 
-#filename = 'AHP_test.csv'  # load test sample (this is small sample of data for testing purposes)
-#filename = 'TotalSKPData.csv'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
-filename = 'Project_manager.csv'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+def main():
+    #filename = 'AHP_test.csv'  # load test sample (this is small sample of data for testing purposes)
+    #filename = 'TotalSKPData.csv'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+    filename = 'Project_manager.csv'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+
+    verbosity = 'summary'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
+
+    directory = './Results'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    TotalSKPData_df = pd.read_csv('./'+filename, index_col=0, delimiter=';')
 
-directory = './Results'
-if not os.path.exists(directory):
-    os.makedirs(directory)
+    LogData("TotalSKPData dataframe:", TotalSKPData_df)
 
-TotalSKPData_df = pd.read_csv('./'+filename, index_col=0, delimiter=';')
+    # DEX RANKING
+    LogMessage("DEX RANKING:")
+    LogSeparator()
 
-print("TotalSKPData dataframe:")
-print(TotalSKPData_df)
-print('-' * 58)
+    DEXRankingScores = GetDEXRankingResults(TotalSKPData_df)
 
-# DEX RANKING
-print("DEX RANKING:")
-print('-' * 58)
+    # Export DataFrame to a csv file
+    DEXRankingScores.to_csv(directory + '/DEX_Results_Project_Manager.csv', sep=';', index=True, header=True)
 
-DEXRankingScores = GetDEXRankingResults(TotalSKPData_df)
+    results = ResultStore(GetResultStorePath(directory, filename), ids=DEXRankingScores.index)
+    results.write('DEX', DEXRankingScores['DEX'], {'model': dex_model_file})
 
-# Export DataFrame to a csv file
-DEXRankingScores.to_csv(directory + '/DEX_Results_Project_Manager.csv', sep=';', index=True, header=True)
+    plot_dex_barh(DEXRankingScores, save_path=directory)
 
-plot_dex_barh(DEXRankingScores, save_path=directory)
+if __name__ == '__main__':
+    main()
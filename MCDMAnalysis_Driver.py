@@ -0,0 +1,172 @@
+#Run any subset of the five MCDM methods (DEX, AHP, TOPSIS, PROMETHEE, PAPRIKA) on one dataset.
+#The dataset is loaded and encoded once and all methods rank the same category codes,
+#the results are the same as the results of the separate ranking scripts.
+import pandas as pd
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from MCDMAnalysis_Codebook import columns, EncodeSKPData, DecodeSKPData, LoadSKPDataFrame
+from MCDMAnalysis_ResultStore import ResultStore, GetResultStorePath
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogData, LogRanking, SetVerbosity
+from MCDMAnalysis_AHP import AHPReplaceValues, GetAHPRankingResults
+from MCDMAnalysis_TOPSIS import TOPSISReplaceValues, GetTOPSISRankingResults
+from MCDMAnalysis_PROMETHEE import (PROMETHEEReplaceValues, PROMETHEEParameters, GetPROMETHEERankingResults,
+                                    weights as weights_promethee, replacement_maps_topsis)
+from MCDMAnalysis_PAPRIKA import PAPRIKAReplaceValues, GetPAPRIKARankingResults
+from MCDMAnalysis_DEX import GetDEXRankingResults
+from MCDMAnalysis_Pipeline import method_params
+
+# Replace values and ranking function of every method which ranks the SKP criteria
+ranking_functions = {
+    'AHP': (AHPReplaceValues, GetAHPRankingResults),
+    'TOPSIS': (TOPSISReplaceValues, GetTOPSISRankingResults),
+    'PROMETHEE': (PROMETHEEReplaceValues, GetPROMETHEERankingResults),
+    'PAPRIKA': (PAPRIKAReplaceValues, GetPAPRIKARankingResults)
+}
+
+# Results file of every method (the files read by the correlation, RBO and bump chart scripts)
+ranking_files = {
+    'DEX': 'DEX_Results.csv',
+    'AHP': 'AHP_Results.csv',
+    'TOPSIS': 'TOPSIS_Results.csv',
+    'PROMETHEE': 'PROMETHEE_Results.csv',
+    'PAPRIKA': 'PAPRIKA_Results.csv'
+}
+
+
+def LoadDataset(filename):
+    # Dataset as it is stored (category strings of a CSV file or category codes of a columnar dataset)
+    if filename.endswith('.skp'):
+        return LoadSKPDataFrame(filename)
+
+    return pd.read_csv(filename, index_col=0, delimiter=';')
+
+
+def is_encoded(Alternatives: pd.DataFrame):
+    return all(col in Alternatives and pd.api.types.is_integer_dtype(Alternatives[col]) for col in columns)
+
+
+def RankMethod(method, Alternatives: pd.DataFrame):
+    """Rank the alternatives with one method (the same steps as the ranking script of the method).
+
+    Args:
+        method (str): 'DEX', 'AHP', 'TOPSIS', 'PROMETHEE' or 'PAPRIKA'.
+        Alternatives (DataFrame): Category codes, or the DEX attributes for DEX.
+
+    Returns:
+        DataFrame: Scores of the alternatives in a column named after the method.
+    """
+    LogMessage(method + " RANKING:")
+    LogSeparator()
+
+    if method == 'DEX':
+        # GetDEXRankingResults adds an ID column to its input
+        return GetDEXRankingResults(Alternatives.copy())
+
+    ReplaceValues, GetRankingResults = ranking_functions[method]
+
+    return GetRankingResults(ReplaceValues(Alternatives))
+
+
+def RunMethods(methods, TotalSKPData_df: pd.DataFrame, parallel=False, workers=None, verbosity='summary'):
+    """Rank the dataset with the methods, the dataset is encoded once and shared by all methods.
+
+    Args:
+        methods (list): Names of the methods.
+        TotalSKPData_df (DataFrame): Dataset as returned by LoadDataset.
+        parallel (bool): Run every method in its own worker process.
+        workers (int): Maximum number of worker processes (None for the number of CPUs).
+        verbosity (str): Verbosity of the worker processes.
+
+    Returns:
+        dict: Ranking DataFrame of every method.
+    """
+    unknown = [method for method in methods if method != 'DEX' and method not in ranking_functions]
+    if unknown:
+        raise ValueError("Unknown methods %s, use some of %s" % (unknown, list(ranking_files)))
+
+    inputs = {}
+
+    if 'DEX' in methods:
+        # DEX model evaluates the categories, not the codes
+        inputs['DEX'] = DecodeSKPData(TotalSKPData_df[columns].to_numpy(), TotalSKPData_df.index) \
+            if is_encoded(TotalSKPData_df) else TotalSKPData_df
+
+    if any(method != 'DEX' for method in methods):
+        # Encode the categories once, all other methods replace the codes with their own values
+        Codes_df = TotalSKPData_df if is_encoded(TotalSKPData_df) else \
+            pd.DataFrame(EncodeSKPData(TotalSKPData_df), index=TotalSKPData_df.index, columns=columns, copy=False)
+        LogData("TotalSKPData category codes:", Codes_df)
+
+        for method in methods:
+            if method != 'DEX':
+                inputs[method] = Codes_df
+
+    if not parallel:
+        return {method: RankMethod(method, inputs[method]) for method in methods}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=SetVerbosity, initargs=(verbosity,)) as executor:
+        futures = {method: executor.submit(RankMethod, method, inputs[method]) for method in methods}
+
+        return {method: future.result() for method, future in futures.items()}
+
+
+def GetMethodParams(method, TotalSKPData_df: pd.DataFrame):
+    # Parameters of the method for the result store
+    if method == 'PROMETHEE':
+        p, c, d = PROMETHEEParameters(PROMETHEEReplaceValues(TotalSKPData_df).to_numpy(dtype='int8'))
+        return {'weights': weights_promethee, 'p': p, 'c': c, 'd': d, 'values': replacement_maps_topsis}
+
+    return method_params[method]
+
+
+def WriteResults(rankings, TotalSKPData_df: pd.DataFrame, directory, filename):
+    # Write the CSV results of every method (same files as the ranking scripts) and the result store of the dataset
+    results = ResultStore(GetResultStorePath(directory, filename), ids=TotalSKPData_df.index)
+
+    for method, Ranking_df in rankings.items():
+        if method == 'PROMETHEE':
+            Ranking_df.to_csv(directory + '/' + ranking_files[method], sep=';', index=True, header=True,
+                              index_label='alternatives')
+        else:
+            Ranking_df.to_csv(directory + '/' + ranking_files[method], sep=';', index=True, header=True)
+
+        results.write(method, Ranking_df[method], GetMethodParams(method, TotalSKPData_df))
+
+    return results
+
+
+def main():
+    filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
+    #filename = 'TotalSKPData.skp'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+
+    methods = ['AHP', 'TOPSIS', 'PROMETHEE', 'PAPRIKA']
+    #methods = ['DEX', 'AHP', 'TOPSIS', 'PROMETHEE', 'PAPRIKA']  #DEX needs a dataset with the attributes of the DEX model
+
+    # Run every method in its own process
+    parallel = False
+    workers = None
+
+    verbosity = 'summary'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
+
+    directory = './Results'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    TotalSKPData_df = LoadDataset('./' + filename)
+    LogData("TotalSKPData dataframe:", TotalSKPData_df)
+
+    rankings = RunMethods(methods, TotalSKPData_df, parallel, workers, verbosity)
+
+    for method, Ranking_df in rankings.items():
+        LogRanking(method + ' final ranking results:', Ranking_df)
+
+    results = WriteResults(rankings, TotalSKPData_df, directory, filename)
+
+    LogData('Ranking places of all methods:', results.to_frame(methods, ranks=True))
+
+
+if __name__ == '__main__':
+    main()
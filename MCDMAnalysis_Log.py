@@ -0,0 +1,98 @@
+#Verbosity controlled output of the ranking scripts
+#silent: nothing, summary: messages, shapes, dtypes, min/max and the top 10 alternatives, full: whole DataFrames and matrices
+import pandas as pd
+import numpy as np
+import logging
+import sys
+
+SILENT = 'silent'
+SUMMARY = 'summary'
+FULL = 'full'
+
+levels = {
+    SILENT: logging.CRITICAL + 1,
+    SUMMARY: logging.INFO,
+    FULL: logging.DEBUG
+}
+
+# Number of the best alternatives shown in the summary of the ranking results
+top_count = 10
+
+logger = logging.getLogger('MCDMAnalysis')
+logger.propagate = False
+
+if not logger.handlers:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+
+logger.setLevel(levels[SUMMARY])
+
+
+def SetVerbosity(verbosity):
+    # Set the verbosity of all ranking scripts ('silent', 'summary' or 'full')
+    if verbosity not in levels:
+        raise ValueError("Unknown verbosity %s, use one of %s" % (verbosity, list(levels)))
+
+    logger.setLevel(levels[verbosity])
+
+
+def summarize(data):
+    # Shape, dtypes and min/max of the numeric values (no formatting of the data itself)
+    if isinstance(data, dict):
+        return 'dict with %d items' % len(data)
+
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        dtypes = pd.Series(data.dtypes).astype(str).unique() if isinstance(data, pd.DataFrame) else [str(data.dtype)]
+        values = data.select_dtypes(include='number').to_numpy() if isinstance(data, pd.DataFrame) else \
+            (data.to_numpy() if pd.api.types.is_numeric_dtype(data) else np.empty(0))
+        text = '%s %s, dtype %s' % (type(data).__name__, data.shape, ', '.join(dtypes))
+    else:
+        values = np.asarray(data)
+        text = 'array %s, dtype %s' % (values.shape, values.dtype)
+        if not np.issubdtype(values.dtype, np.number):
+            values = np.empty(0)
+
+    if values.size:
+        text += ', min %s, max %s' % (np.nanmin(values), np.nanmax(values))
+
+    return text
+
+
+def LogMessage(message):
+    # Messages are shown in summary and full output
+    logger.info(message)
+
+
+def LogSeparator():
+    logger.info('-' * 58)
+
+
+def LogData(title, data):
+    """Show a DataFrame, array or other data: whole in full output, summarized in summary output.
+
+    Args:
+        title (str): Line shown before the data.
+        data: DataFrame, Series, ndarray, list or dict.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(title)
+        logger.debug(data)
+        logger.debug('-' * 58)
+    elif logger.isEnabledFor(logging.INFO):
+        logger.info(title + ' ' + summarize(data))
+        logger.info('-' * 58)
+
+
+def LogRanking(title, Rankings_df: pd.DataFrame, method=None):
+    """Show ranking results: whole in full output, the top alternatives by the method score in summary output."""
+    if logger.isEnabledFor(logging.DEBUG):
+        LogData(title, Rankings_df)
+    elif logger.isEnabledFor(logging.INFO):
+        if method is None:
+            method = Rankings_df.columns[0]
+
+        logger.info(title + ' ' + summarize(Rankings_df))
+        logger.info('Top %d alternatives by %s:' % (top_count, method))
+        logger.info(Rankings_df.nlargest(top_count, method))
+        logger.info('-' * 58)
@@ -0,0 +1,320 @@
+#PAPRIKA elicitation: the decision maker compares pairs of partial profiles (two criteria at a time) and the point
+#values of the categories are derived from the answers. Run this code to elicit the point values with a simulated
+#decision maker (the hard-coded points of MCDMAnalysis_PAPRIKA.py, which were elicited with 1000minds)
+import pandas as pd
+import numpy as np
+import itertools
+import time
+
+from scipy.optimize import linprog
+from scipy.stats import spearmanr
+
+from MCDMAnalysis_Codebook import columns, criteria_levels
+from MCDMAnalysis_PAPRIKA import replacement_maps_paprika, PAPRIKAReplaceValues, GetPAPRIKARankingResults
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogData, SetVerbosity
+
+# Points of the profile the decision maker prefers are at least epsilon higher
+epsilon = 0.01
+
+# Sum of the points of the best categories of all criteria
+total_points = 100
+
+# Tolerance of the LP results
+tolerance = 1e-7
+
+# Answers: the first profile is better, both are equal, the second profile is better
+FIRST = 1
+EQUAL = 0
+SECOND = -1
+
+
+def GeneratePairs(levels=criteria_levels):
+    """Undominated pairs of partial profiles on two criteria.
+
+    A pair is (i, a_i, b_i, j, a_j, b_j): the first profile has the category a_i of criterion i and a_j of criterion j,
+    the second one has b_i and b_j. The first profile is better on i (a_i > b_i) and worse on j (a_j < b_j), pairs
+    where one profile is better on both criteria are dominated and never asked.
+    Pairs are ordered from the smallest to the largest differences of the categories (the easiest questions first).
+
+    Args:
+        levels (dict): Categories of every criterion from the worst to the best.
+
+    Returns:
+        list: Pairs with the positions of the criteria and of the categories.
+    """
+    counts = [len(categories) for categories in levels.values()]
+    pairs = []
+
+    for i, j in itertools.combinations(range(len(counts)), 2):
+        for b_i, a_i in itertools.combinations(range(counts[i]), 2):
+            for a_j, b_j in itertools.combinations(range(counts[j]), 2):
+                pairs.append((i, a_i, b_i, j, a_j, b_j))
+
+    return sorted(pairs, key=lambda pair: (pair[1] - pair[2] + pair[5] - pair[4], pair))
+
+
+def SimulatedDecisionMaker(points=replacement_maps_paprika, levels=criteria_levels):
+    # Decision maker who answers with the sum of the points of the categories (e.g. the hard-coded PAPRIKA points)
+    values = [[points[col][category] for category in categories] for col, categories in levels.items()]
+
+    def answer(pair):
+        i, a_i, b_i, j, a_j, b_j = pair
+        difference = values[i][a_i] + values[j][a_j] - values[i][b_i] - values[j][b_j]
+        return EQUAL if abs(difference) < 1e-9 else (FIRST if difference > 0 else SECOND)
+
+    return answer
+
+
+def ScriptedDecisionMaker(answers):
+    # Decision maker who gives the answers (FIRST, EQUAL or SECOND) in the order of the questions
+    answers = iter(answers)
+
+    def answer(pair):
+        try:
+            return next(answers)
+        except StopIteration:
+            raise ValueError("Scripted decision maker has no answer for the question %s" % (pair,)) from None
+
+    return answer
+
+
+class PAPRIKAElicitation:
+    """
+    PAPRIKA elicitation of the point values of the categories.
+
+    The unknown points are LP variables: the worst category of every criterion has 0 points, points do not decrease
+    with better categories and the points of the best categories sum to total_points. An answer adds the constraint
+    points(first) - points(second) >= epsilon (<= -epsilon, = 0 for equal profiles).
+    A pair is implied when the constraints allow only one answer, which covers the transitivity of the answers and
+    the dominance of the categories. Pairs are checked lazily: feasible points of earlier LP solutions (witnesses)
+    which give the pair different answers prove that the pair is not implied without any LP, only the other pairs
+    need the two LPs (min and max of the points difference). An implied pair stays implied, so every pair is solved
+    at most once as implied and the decision maker is asked only about pairs which are not implied.
+
+    :param dict levels: Categories of every criterion from the worst to the best.
+    :param float epsilon: Smallest points difference of two profiles which are not equal.
+    """
+    def __init__(self, levels=criteria_levels, epsilon=epsilon):
+        self.levels = levels
+        self.epsilon = epsilon
+
+        # LP variable of every category except the worst one of every criterion
+        counts = [len(categories) for categories in levels.values()]
+        self.first_variable = np.concatenate(([0], np.cumsum([count - 1 for count in counts])))
+        variables = self.first_variable[-1]
+
+        # Points do not decrease with better categories, points of the best categories sum to total_points
+        monotonic = []
+        for k, count in enumerate(counts):
+            for level in range(2, count):
+                row = np.zeros(variables)
+                row[self.variable(k, level - 1)] = 1
+                row[self.variable(k, level)] = -1
+                monotonic.append(row)
+
+        self.A_ub = np.array(monotonic).reshape(-1, variables)
+        self.b_ub = np.zeros(len(self.A_ub))
+        self.A_eq = np.zeros((1, variables))
+        self.A_eq[0, [self.variable(k, count - 1) for k, count in enumerate(counts) if count > 1]] = 1
+        self.b_eq = np.array([float(total_points)])
+
+        self.pairs = GeneratePairs(levels)
+        self.rows = np.array([self.pair_row(pair) for pair in self.pairs]).reshape(-1, variables)
+
+        # Answer of every pair (nan while unknown) and whether it was asked or implied
+        self.relations = np.full(len(self.pairs), np.nan)
+        self.asked = np.zeros(len(self.pairs), dtype=bool)
+        self.position = 0
+
+        self.lp_solves = 0
+        self.witnesses = np.empty((0, variables))
+        self.__solve(np.zeros(variables))
+
+    def variable(self, k, level):
+        return self.first_variable[k] + level - 1
+
+    def pair_row(self, pair):
+        # Coefficients of points(first) - points(second)
+        i, a_i, b_i, j, a_j, b_j = pair
+        row = np.zeros(self.first_variable[-1])
+        for k, level, sign in ((i, a_i, 1), (i, b_i, -1), (j, a_j, 1), (j, b_j, -1)):
+            if level > 0:
+                row[self.variable(k, level)] += sign
+        return row
+
+    def __solve(self, objective):
+        # Minimum of the objective over the feasible points, the solution is kept as a witness
+        self.lp_solves += 1
+        result = linprog(objective, A_ub=self.A_ub, b_ub=self.b_ub, A_eq=self.A_eq, b_eq=self.b_eq,
+                         bounds=(0, None), method='highs')
+        if result.status != 0:
+            raise ValueError("Answers of the decision maker are not consistent (%s)" % result.message)
+
+        self.witnesses = np.vstack([self.witnesses, result.x])
+        return result.fun
+
+    def implied(self, index):
+        """Answer implied by the earlier answers for the pair, None when the decision maker has to be asked."""
+        row = self.rows[index]
+
+        # Witnesses with differences of different signs prove that more than one answer is possible
+        differences = self.witnesses @ row
+        if np.any(differences > tolerance) + np.any(np.abs(differences) <= tolerance) + \
+                np.any(differences < -tolerance) > 1:
+            return None
+
+        low = self.__solve(row)
+        high = -self.__solve(-row)
+
+        if low > tolerance:
+            return FIRST
+        if high < -tolerance:
+            return SECOND
+        if low >= -tolerance and high <= tolerance:
+            return EQUAL
+        return None
+
+    def answer(self, index, relation):
+        """Add the answer of the decision maker for the pair.
+
+        :param int index: Position of the pair in self.pairs.
+        :param int relation: FIRST, EQUAL or SECOND.
+        """
+        row = self.rows[index]
+
+        if relation == FIRST:
+            self.A_ub = np.vstack([self.A_ub, -row])
+            self.b_ub = np.append(self.b_ub, -self.epsilon)
+        elif relation == SECOND:
+            self.A_ub = np.vstack([self.A_ub, row])
+            self.b_ub = np.append(self.b_ub, -self.epsilon)
+        elif relation == EQUAL:
+            self.A_eq = np.vstack([self.A_eq, row])
+            self.b_eq = np.append(self.b_eq, 0.0)
+        else:
+            raise ValueError("Unknown answer %s, use FIRST, EQUAL or SECOND" % relation)
+
+        self.relations[index] = relation
+        self.asked[index] = True
+
+        # Witnesses which do not satisfy the answer are no longer feasible
+        differences = self.witnesses @ row
+        valid = differences >= self.epsilon - tolerance if relation == FIRST else \
+            (differences <= -self.epsilon + tolerance if relation == SECOND else np.abs(differences) <= tolerance)
+        self.witnesses = self.witnesses[valid]
+
+    def next_question(self):
+        """Next pair which is not implied by the answers (implied pairs on the way are recorded), None at the end."""
+        while self.position < len(self.pairs):
+            index = self.position
+
+            if np.isnan(self.relations[index]):
+                relation = self.implied(index)
+                if relation is None:
+                    return index
+                self.relations[index] = relation
+
+            self.position += 1
+
+        return None
+
+    def run(self, decision_maker, max_questions=None):
+        """Ask the decision maker about every pair which is not implied.
+
+        :param decision_maker: Function which answers a pair with FIRST, EQUAL or SECOND.
+        :param int max_questions: Stop after this many questions (None for all).
+        :return: Number of questions asked.
+        """
+        questions = 0
+
+        while max_questions is None or questions < max_questions:
+            index = self.next_question()
+            if index is None:
+                break
+
+            self.answer(index, decision_maker(self.pairs[index]))
+            questions += 1
+
+        return questions
+
+    def points(self, decimals=None):
+        """Point values of the categories of every criterion (same form as replacement_maps_paprika).
+
+        Points are the mean of the extreme feasible points (min and max of every variable), an estimate of the
+        centre of the feasible points as in PAPRIKA.
+        """
+        solutions = []
+        for variable in range(self.first_variable[-1]):
+            for sign in (1, -1):
+                objective = np.zeros(self.first_variable[-1])
+                objective[variable] = sign
+                self.__solve(objective)
+                solutions.append(self.witnesses[-1])
+
+        centre = np.mean(solutions, axis=0)
+
+        value_maps = {}
+        for k, (col, categories) in enumerate(self.levels.items()):
+            values = [0.0] + [float(centre[self.variable(k, level)]) for level in range(1, len(categories))]
+            if decimals is not None:
+                values = [round(value, decimals) for value in values]
+            value_maps[col] = dict(zip(categories, values))
+
+        return value_maps
+
+    def to_frame(self):
+        # Pairs with their answers and whether the decision maker was asked
+        names = list(self.levels)
+        categories = list(self.levels.values())
+
+        return pd.DataFrame([(names[i], categories[i][a_i], categories[i][b_i], names[j], categories[j][a_j],
+                              categories[j][b_j], relation, asked)
+                             for (i, a_i, b_i, j, a_j, b_j), relation, asked
+                             in zip(self.pairs, self.relations, self.asked)],
+                            columns=['criterion 1', 'first 1', 'second 1', 'criterion 2', 'first 2', 'second 2',
+                                     'answer', 'asked'])
+
+
+def main():
+    filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
+
+    verbosity = 'summary'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
+
+    LogMessage("PAPRIKA ELICITATION:")
+    LogSeparator()
+
+    # Decision maker answers with the hard-coded points of MCDMAnalysis_PAPRIKA.py
+    elicitation = PAPRIKAElicitation()
+
+    start = time.perf_counter()
+    questions = elicitation.run(SimulatedDecisionMaker(replacement_maps_paprika))
+    duration = time.perf_counter() - start
+
+    LogMessage('%d pairs, %d questions asked, %d implied, %d LP solves in %.1f s'
+               % (len(elicitation.pairs), questions, len(elicitation.pairs) - questions, elicitation.lp_solves,
+                  duration))
+    LogSeparator()
+    LogData('Answers of the pairs:', elicitation.to_frame())
+
+    value_maps = elicitation.points(decimals=1)
+
+    points_df = pd.DataFrame([[category, value, replacement_maps_paprika[col][category]]
+                              for col, values in value_maps.items() for category, value in values.items()],
+                             columns=['category', 'elicited', 'hard-coded'],
+                             index=[col for col, values in value_maps.items() for category in values])
+    LogData('Elicited points of the categories and the hard-coded points of MCDMAnalysis_PAPRIKA.py:', points_df)
+
+    # PAPRIKA ranking with the elicited points
+    TotalSKPData_df = pd.read_csv('./' + filename, index_col=0, delimiter=';')
+
+    PAPRIKARanking_df = GetPAPRIKARankingResults(PAPRIKAReplaceValues(TotalSKPData_df, value_maps=value_maps))
+    HardCodedRanking_df = GetPAPRIKARankingResults(PAPRIKAReplaceValues(TotalSKPData_df))
+    LogData('PAPRIKA ranking results with the elicited points:', PAPRIKARanking_df)
+
+    LogMessage('Spearman correlation with the ranking of the hard-coded points: %.4f'
+               % spearmanr(PAPRIKARanking_df['PAPRIKA'], HardCodedRanking_df['PAPRIKA'])[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -8,66 +8,104 @@ import numpy as np
 import os
 
 from numpy import *
-from scipy.sparse import lil_matrix, csr_matrix
-from joblib import Parallel, delayed
-
-col_available_positions = 'Available positions'
-col_skp_vs_esco = 'SKPvsESCO'
-col_languages = 'Languages'
-col_driving_license = 'Driving license'
-col_age = 'Age appropriateness'
-col_disability = 'Disability appropriateness'
-col_skp_wish = 'SKP Wish'
-col_js_contract_wish = 'JS wishes for contract type'
-col_job_contract = 'Job contract type'
-col_js_career = 'JS career wishes'
-col_job_advancement = 'Job career advancement'
-col_job_hours = 'Job working hours'
-col_js_hours = 'JS working hours wishes'
-col_distance = 'Distance to job position'
-col_location = 'JS wish location'
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from statistics import NormalDist
+
+from MCDMAnalysis_Codebook import (col_available_positions, col_skp_vs_esco, col_languages, col_driving_license,
+                                   col_age, col_disability, col_skp_wish, col_js_contract_wish, col_job_contract,
+                                   col_js_career, col_job_advancement, col_job_hours, col_js_hours, col_distance,
+                                   col_location, columns, LoadSKPDataFrame, EncodeValues)
+from MCDMAnalysis_ResultStore import ResultStore, GetResultStorePath, RankScores
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogData, LogRanking, SetVerbosity
+
+# Quantitative values of the qualitative categories
+# Simply begin with 1 for the lowest category and for each more valuable increase value by 1 (same as TOPSIS)
+map_three_topsis = {'small': 1, 'medium': 2, 'large': 3}
+map_competences_topsis = {'>10': 1, '5 - 10': 2, '< 5 new competences': 3}
+map_yes_no_topsis = {'no': 1, 'yes': 2}
+map_part_full_topsis = {'part time': 1, 'full time': 2, 'not important': 3}
+map_contract_topsis = {'part time': 1, 'full time': 2}
+map_career_topsis = {'downgrade': 1, 'same': 2, 'not important': 3, 'upgrade career': 4}
+map_advancement_topsis = {'down': 1, 'same': 2, 'up': 3}
+map_hours_topsis = {'daily/night shift': 1, 'two-shift': 2, 'afternoon shift': 3, 'morning shift': 4}
+map_distance_topsis = {'> 20 km': 1, '10 - 20 km': 2, '< 10 km': 3}
+
+replacement_maps_topsis = {
+    col_available_positions: map_three_topsis,
+    col_skp_vs_esco: map_competences_topsis,
+    col_languages: map_yes_no_topsis,
+    col_driving_license: map_yes_no_topsis,
+    col_age: map_yes_no_topsis,
+    col_disability: map_yes_no_topsis,
+    col_skp_wish: map_yes_no_topsis,
+    col_js_contract_wish: map_part_full_topsis,
+    col_job_contract: map_contract_topsis,
+    col_js_career: map_career_topsis,
+    col_job_advancement: map_advancement_topsis,
+    col_job_hours: map_hours_topsis,
+    col_js_hours: map_hours_topsis,
+    col_distance: map_distance_topsis,
+    col_location: map_yes_no_topsis
+}
 
 def PROMETHEEReplaceValues(AlterPROMETHEE: pd.DataFrame):
-    # Replace qualitative values with quantitative
-    # Simply begin with 1 for the lowest category and for each more valuable increase value by 1 (same as TOPSIS)
-
-    map_three_topsis = {'small': 1, 'medium': 2, 'large': 3}
-    map_competences_topsis = {'>10': 1, '5 - 10': 2, '< 5 new competences': 3}
-    map_yes_no_topsis = {'no': 1, 'yes': 2}
-    map_part_full_topsis = {'part time': 1, 'full time': 2, 'not important': 3}
-    map_contract_topsis = {'part time': 1, 'full time': 2}
-    map_career_topsis = {'downgrade': 1, 'same': 2, 'not important': 3, 'upgrade career': 4}
-    map_advancement_topsis = {'down': 1, 'same': 2, 'up': 3}
-    map_hours_topsis = {'daily/night shift': 1, 'two-shift': 2, 'afternoon shift': 3, 'morning shift': 4}
-    map_distance_topsis = {'> 20 km': 1, '10 - 20 km': 2, '< 10 km': 3}
-
-    replacement_maps_topsis = {
-        col_available_positions: map_three_topsis,
-        col_skp_vs_esco: map_competences_topsis,
-        col_languages: map_yes_no_topsis,
-        col_driving_license: map_yes_no_topsis,
-        col_age: map_yes_no_topsis,
-        col_disability: map_yes_no_topsis,
-        col_skp_wish: map_yes_no_topsis,
-        col_js_contract_wish: map_part_full_topsis,
-        col_job_contract: map_contract_topsis,
-        col_js_career: map_career_topsis,
-        col_job_advancement: map_advancement_topsis,
-        col_job_hours: map_hours_topsis,
-        col_js_hours: map_hours_topsis,
-        col_distance: map_distance_topsis,
-        col_location: map_yes_no_topsis
-    }
-
-    pd.set_option('future.no_silent_downcasting', True)
-
-    for column, value_map in replacement_maps_topsis.items():
-        AlterPROMETHEE[column] = AlterPROMETHEE[column].replace(value_map)
-
-    return AlterPROMETHEE
-
-
-def prometheeMC(x, p, c, d, w):
+    # Replace qualitative values with quantitative (replacement_maps_topsis), AlterPROMETHEE is not changed
+    return pd.DataFrame(EncodeValues(AlterPROMETHEE, replacement_maps_topsis, np.int8),
+                        index=AlterPROMETHEE.index, columns=columns, copy=False)
+
+
+# Weights of the criteria (global weights from the dexi model)
+weights = array([9.82, 19.64, 4.42, 4.42, 13.68, 13.68, 4.56, 7.15, 4.77, 0, 4.47, 2.23, 2.23, 7.31, 1.62],
+                dtype='float16')
+
+def PROMETHEEParameters(AlterArray):
+    # Preference parameters (max and min value of each criterion), criteria optimization and preference functions
+    pv = array(amax(AlterArray, axis=0), dtype='int8')
+    nv = array(amin(AlterArray, axis=0), dtype='int8')
+
+    # preference parameters of all criteria array
+    p = array([pv, nv], dtype='int8')
+
+    # Criteria optimization array (0 for min, 1 for max)
+    c = np.ones(AlterArray.shape[1], dtype=int8)
+
+    # Preference function array
+    d = ['li'] * AlterArray.shape[1]
+
+    return p, c, d
+
+def GetPROMETHEERankingResults(AlterPROMETHEE: pd.DataFrame, uni_net_flows=None):
+    # Convert the DataFrame to a NumPy array
+    AlterArray = AlterPROMETHEE.to_numpy(dtype='int8')
+    LogData("TotalSKPData numeric array:", AlterArray)
+
+    # Extract the index as a NumPy array
+    index_array = AlterPROMETHEE.index.to_numpy()
+
+    # Print weights of the criteria
+    LogData('Weights of the criteria', weights)
+
+    p, c, d = PROMETHEEParameters(AlterArray)
+
+    # Print the maximum and minimum values for each criterion
+    LogData('Maximum values for each criterion:', p[0])
+    LogData('Minimum values for each criterion:', p[1])
+
+    # Print the preference parameters of all criteria array
+    LogData('Preference parameters of all criteria array:', p)
+
+    LogData('Preference function array:', d)
+
+    # final results
+    final_net_flows = prometheeMC(AlterArray, p, c, d, weights, uni_net_flows=uni_net_flows)
+
+    AlterRankings_df = pd.DataFrame(final_net_flows, index=index_array, columns=['PROMETHEE'])
+
+    return AlterRankings_df
+
+def prometheeMC(x, p, c, d, w, workers=None, uni_net_flows=None, sample_size=None, top_k=0, half_widths=None,
+                exact=None):
     # === START OF THIRD-PARTY CODE ===
     """Perform PROMETHEE analysis to compute net flows.
 
@@ -77,16 +115,43 @@ def prometheeMC(x, p, c, d, w):
         c (ndarray): Criteria optimization array (0 for min, 1 for max).
         d (list): Preference function array.
         w (ndarray): Weights array.
+        workers (int): Worker processes of the pairwise engine (None for the number of CPUs).
+        uni_net_flows (ndarray): Optional array (criteria x alternatives) which keeps the unicriterion net flows
+            (not with sample_size, the approximate mode has no unicriterion net flows).
+        sample_size (int): Approximate net flows against a sample of this many alternatives (PROMETHEESampledFlows).
+        top_k (int): Approximate mode computes the net flows of the top_k best alternatives exactly.
+        half_widths (ndarray): Optional array which keeps the half widths of the confidence intervals
+            of the approximate net flows.
+        exact (ndarray): Optional bool array which keeps which approximate net flows are exact (the top_k).
 
     Returns:
         ndarray: Final net flows after applying PROMETHEE method.
     """
-
+    if sample_size is not None:
+        if uni_net_flows is not None:
+            raise ValueError("Approximate net flows (sample_size) have no unicriterion net flows")
+
+        net_flows, widths, refined = PROMETHEESampledFlows(x, p, d, w, sample_size, top_k)
+        if half_widths is not None:
+            half_widths[:] = widths
+        if exact is not None:
+            exact[:] = False
+            exact[refined] = True
+        return np.round(net_flows, decimals=4)
 
     weighted_uni_net_flows = np.zeros((x.shape[1], x.shape[0]))  # Preallocate array
 
+    # Criteria which need pairwise differences are computed together, all of them tile by tile
+    pairwise = [i for i in range(x.shape[1]) if uses_pairwise(x[:, i], d[i])]
+    if pairwise:
+        pairwise_flows = PairwiseNetFlows(x[:, pairwise], p[:, pairwise], [d[i] for i in pairwise], workers)
+
     for i in range(x.shape[1]):
-        weighted_uni_net_flows[i] = w[i] * uni_cal(x[:, i], p[:, i], c[i], d[i])
+        flows = pairwise_flows[pairwise.index(i)] if i in pairwise else uni_flows(x[:, i], p[:, i], c[i], d[i])
+        weighted_uni_net_flows[i] = w[i] * flows
+
+        if uni_net_flows is not None:
+            uni_net_flows[i] = flows
 
     # Calculate total net flows by summing the weighted flows across all criteria
     total_net_flows = np.sum(weighted_uni_net_flows, axis=0)
@@ -94,50 +159,582 @@ def prometheeMC(x, p, c, d, w):
     return np.round(total_net_flows, decimals=4)
     # === END OF THIRD-PARTY CODE ===
 
-# === START OF THIRD-PARTY CODE ===
-def calculate_uni_for_pair(i, x, p):
-    """Calculate preference values for a specific pair."""
+# Preference functions of the difference d of two alternatives on a criterion, with the thresholds
+# q (indifference), p (preference) and s (Gaussian), in the order of the rows of the preference parameters.
+# Piecewise functions are 1 above the upper threshold, base + (d - lower) / width between the thresholds and 0 below.
+piecewise_functions = {
+    'u': lambda q, p: (0.0, 0.0, 0.0, np.inf),  # usual
+    'us': lambda q, p: (q, q, 0.0, np.inf),  # U-shape
+    'vs': lambda q, p: (0.0, p, 0.0, p),  # V-shape
+    'le': lambda q, p: (q, p, 0.5, np.inf),  # level
+    'li': lambda q, p: (q, p, 0.0, p - q)  # linear
+}
+
+preference_functions = list(piecewise_functions) + ['g']  # and Gaussian
+
+def preference_thresholds(p):
+    # q, p and s of a criterion (s is p when the preference parameters have only two rows)
+    p = np.asarray(p, dtype=np.float64)
+    return p[0], p[1], (p[2] if len(p) > 2 else p[1])
+
+def PreferenceValues(f, d, p):
+    """Preference of the differences d (array of any shape, e.g. a block of pairwise differences).
+
+    Args:
+        f (str): Preference function, one of preference_functions.
+        d (ndarray): Differences of the values of two alternatives.
+        p (ndarray): Preference parameters of the criterion (q, p and optionally s).
+
+    Returns:
+        ndarray: float32 preferences between 0 and 1.
+    """
+    q, pt, s = preference_thresholds(p)
+    d = np.asarray(d)
+
+    if f in piecewise_functions:
+        lower, upper, base, width = piecewise_functions[f](q, pt)
+        between = (d > lower) & (d <= upper)
+        values = np.where(d > upper, 1.0, 0.0)
+        values[between] = base + (d[between] - lower) / width
+    elif f == 'g':
+        values = np.where(d > 0, -np.expm1(-np.square(d, dtype=np.float64) / (2 * s * s)), 0.0)
+    else:
+        raise ValueError("Unknown preference function %s, use one of %s" % (f, preference_functions))
+
+    return values.astype(np.float32)
+
+#Exact net flows in linear time for integer values (the pairs of all alternatives are never formed)
+def uni_cal_levels(x, p, c, f):
+    """Unicriterion net flows from the histogram of the levels of the criterion, in O(n * levels).
+
+    The preference of one alternative over another depends only on their two levels, so the positive (negative)
+    flow of an alternative is the sum over all levels of the count of the level times the preference of its level
+    over (under) that level. The pairs of an alternative with itself are counted and the sums are divided by n - 1.
+
+    Args:
+        x (ndarray): Integer values of the alternatives on the criterion.
+        p (ndarray): Preference parameters of the criterion.
+        c (int): Criteria optimization (both give the same flows).
+        f (str): Preference function.
+
+    Returns:
+        ndarray: float32 net flows.
+    """
     n = x.shape[0]
-    results = np.zeros(n, dtype=np.float32)  # Initialize the result for this row
-    for j in range(n):
-        diff = x[i] - x[j]
-        if diff > p[1]:
-            results[j] = 1
-        elif p[0] < diff <= p[1]:
-            results[j] = (diff - p[0]) / (p[1] - p[0])
-    return results
-# === END OF THIRD-PARTY CODE ===
 
-#This part of code (uni_cal function) is modified to support parallelization to speed up the process
-def uni_cal(x, p, c, f):
+    # Levels from the min to the max value, the level of every alternative and the count of every level
+    offset = int(np.min(x))
+    inverse = np.asarray(x, dtype=np.intp) - offset
+    counts = np.bincount(inverse).astype(np.float32)
+    levels = np.arange(offset, offset + len(counts))
+
+    net_flows = level_net_flows(levels, counts, p, f, n)[inverse]
+
+    return net_flows
+
+def level_net_flows(levels, counts, p, f, n):
+    # Net flow of every level from the float32 counts of the levels of n alternatives
+    # Preference of every level (rows) over every level (columns)
+    pref = PreferenceValues(f, levels[:, None] - levels[None, :], p)
+
+    pos_flows = (pref @ counts) / (n - 1)
+    neg_flows = (counts @ pref) / (n - 1)
+
+    return pos_flows - neg_flows
+
+def threshold_bounds(levels, t, side):
+    """Bounds of the levels preferred by more than a threshold, tested on the differences as in PreferenceValues.
+
+    Searching the shifted keys level - t or level + t in the levels is off by the rounding of the differences,
+    so the binary search only narrows the bound to the levels within a rounding tolerance of the key and
+    the bound is settled with the exact differences of those levels (the tests are monotone in sorted order).
+
+    Args:
+        levels (ndarray): Sorted distinct float64 values of the alternatives.
+        t (float): Threshold.
+        side (str): 'pos' for the number of levels v with x - v > t of every level x,
+            'neg' for the first index of the levels v with v - x > t of every level x.
+
+    Returns:
+        ndarray: Bound of every level.
+    """
+    key = levels - t if side == 'pos' else levels + t
+
+    def passes(rows, mid):
+        # Levels before the bound pass the test: x - v > t ('pos') or not v - x > t ('neg')
+        if side == 'pos':
+            return levels[rows] - levels[mid] > t
+        return ~(levels[mid] - levels[rows] > t)
+
+    # Rounding of the key and of the differences near the key is far below the tolerance,
+    # all levels below key - tolerance pass and all levels above key + tolerance fail
+    tolerance = 4 * np.finfo(np.float64).eps * (np.abs(levels) + np.abs(t))
+    lo = np.searchsorted(levels, key - tolerance, side='left')
+
+    # Most bounds are settled by the first level of the window
+    active = np.flatnonzero(lo < len(levels))
+    active = active[passes(active, lo[active])]
+    lo[active] += 1
+    hi = np.searchsorted(levels, key[active] + tolerance[active], side='right')
+
+    while len(active):
+        keep = lo[active] < hi
+        active, hi = active[keep], hi[keep]
+        mid = (lo[active] + hi) // 2
+
+        passed = passes(active, mid)
+        lo[active] = np.where(passed, mid + 1, lo[active])
+        hi = np.where(passed, hi, mid)
+
+    return lo
+
+def uni_cal_sorted(x, p, c, f):
+    """Unicriterion net flows of a piecewise preference function from the sorted values, in O(n log n).
+
+    Alternatives preferred by more than the upper threshold are counted with binary search, the linear part
+    between the thresholds is summed with the cumulative sums of the sorted values.
+    The thresholds are tested on the differences of the values as in PreferenceValues (threshold_bounds),
+    so every pair is on the same side of a threshold as in PairwiseNetFlows and the net flows differ only by
+    the rounding of the sums.
+    """
     n = x.shape[0]
-    uni = lil_matrix((n, n), dtype=np.float32)  # Use lil_matrix for construction
+    q, pt, s = preference_thresholds(p)
+    lower, upper, base, width = piecewise_functions[f](q, pt)
 
-    if f == 'li':
-        # Use joblib to parallelize the computation of each row
-        uni_data = Parallel(n_jobs=-1)(delayed(calculate_uni_for_pair)(i, x, p) for i in range(n))
+    # Empty band (width 0 or below) or a constant band (infinite width) has no linear part
+    slope = 1 / width if 0 < width < np.inf else 0.0
 
-        # Fill the sparse matrix with results from each row
-        for i in range(n):
-            uni[i, :] = uni_data[i]
+    # Flows are computed in the sorted order (binary search of sorted keys is cache friendly) and put back
+    order = np.argsort(x, kind='stable')
+    x = values = np.asarray(x, dtype=np.float64)[order]
+    sums = np.concatenate(([0.0], np.cumsum(values)))
 
-    # Convert to csr_matrix once construction is complete
-    uni_csr = uni.tocsr()
+    # Bounds are searched for the distinct values (levels), the bound of a level is the position of its first value
+    first = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+    levels = values[first]
+    starts = np.append(first, n)
+    counts = np.diff(starts)
 
-    # Transpose if necessary (flip pos/neg flows accordingly)
-    if c == 1:
-        uni_csr = uni_csr.transpose()
-        pos_flows = np.array(uni_csr.sum(axis=0)).flatten() / (n - 1)  # Transposed: axis=0 for positive flows
-        neg_flows = np.array(uni_csr.sum(axis=1)).flatten() / (n - 1)
-    else:
-        pos_flows = np.array(uni_csr.sum(axis=1)).flatten() / (n - 1)  # Default case: axis=1 for negative flows
-        neg_flows = np.array(uni_csr.sum(axis=0)).flatten() / (n - 1)
+    def bounds(t, side):
+        return np.repeat(starts[threshold_bounds(levels, t, side)], counts)
+
+    # Positive flow: alternatives with x - value > upper and the band lower < x - value <= upper
+    above = bounds(upper, 'pos')
+    band = np.maximum(bounds(lower, 'pos'), above)
+    pos_flows = above + (band - above) * (base + (x - lower) * slope) - (sums[band] - sums[above]) * slope
+
+    # Negative flow: alternatives with value - x > upper and the band lower < value - x <= upper
+    below = bounds(upper, 'neg')
+    band = np.minimum(bounds(lower, 'neg'), below)
+    neg_flows = (n - below) + (below - band) * (base - (x + lower) * slope) + (sums[below] - sums[band]) * slope
 
-    # Calculate net flows
-    net_flows = pos_flows - neg_flows
+    net_flows = np.empty(n, dtype=np.float32)
+    net_flows[order] = (pos_flows - neg_flows) / (n - 1)
 
     return net_flows
 
+# Integer criteria with up to this many levels use the level histogram
+max_levels = 4096
+
+# Tile of the pairwise engine (alternatives x alternatives), the differences of a tile fit the CPU cache
+tile_rows = 256
+tile_cols = 2048
+
+def uses_levels(x):
+    return np.issubdtype(x.dtype, np.integer) and int(np.max(x)) - int(np.min(x)) < max_levels
+
+def uses_pairwise(x, f):
+    # Non-integer values of the Gaussian function have no shortcut, exact flows need all pairs
+    return not uses_levels(x) and f not in piecewise_functions
+
+def pairwise_stripe(x, p, d, first, last, pos_flows, neg_flows):
+    """Positive and negative flows of the alternatives first..last on all criteria, tile by tile.
+
+    Tiles of rows and columns of the pairwise differences are reduced into the flow accumulators right away,
+    the preference matrix is never stored. All criteria are handled for a tile before the next tile.
+
+    Args:
+        x (ndarray): Values (criteria x alternatives).
+        p (ndarray): Preference parameters (rows x criteria).
+        d (list): Preference function of every criterion.
+        first, last (int): Rows of the stripe, first is a multiple of tile_rows.
+        pos_flows, neg_flows (ndarray): Accumulators (criteria x alternatives) of the sums of the preferences.
+    """
+    n = x.shape[1]
+
+    for row in range(first, last, tile_rows):
+        rows = slice(row, row + tile_rows if row + tile_rows < last else last)
+
+        for col in range(0, n, tile_cols):
+            cols = slice(col, col + tile_cols)
+
+            for k in range(x.shape[0]):
+                diff = x[k, rows, None] - x[k, None, cols]
+                pos_flows[k, rows] += PreferenceValues(d[k], diff, p[:, k]).sum(axis=1)
+                neg_flows[k, rows] += PreferenceValues(d[k], np.negative(diff, out=diff), p[:, k]).sum(axis=1)
+
+def pairwise_worker(values_name, flows_name, shape, p, d, first, last):
+    # Stripe of the pairwise engine in a worker process, values and flows are in shared memory
+    values_shm = SharedMemory(name=values_name)
+    flows_shm = SharedMemory(name=flows_name)
+
+    try:
+        x = np.ndarray(shape, dtype=np.float64, buffer=values_shm.buf)
+        flows = np.ndarray((2,) + shape, dtype=np.float64, buffer=flows_shm.buf)
+        pairwise_stripe(x, p, d, first, last, flows[0], flows[1])
+        del x, flows
+    finally:
+        values_shm.close()
+        flows_shm.close()
+
+def PairwiseNetFlows(x, p, d, workers=None):
+    """Unicriterion net flows of any preference functions from all pairs of alternatives, in O(n^2) time.
+
+    The alternatives are split into stripes of rows. Every worker process computes the flows of its stripes
+    against all alternatives with pairwise_stripe, the values and the flows are shared through shared memory,
+    so nothing but the stripe bounds is sent to the workers and the stripes are written in place.
+
+    Args:
+        x (ndarray): Values (alternatives x criteria).
+        p (ndarray): Preference parameters (rows x criteria).
+        d (list): Preference function of every criterion.
+        workers (int): Worker processes (None for the number of CPUs, 1 computes in this process).
+
+    Returns:
+        ndarray: float32 net flows (criteria x alternatives).
+    """
+    for f in d:
+        if f not in preference_functions:
+            raise ValueError("Unknown preference function %s, use one of %s" % (f, preference_functions))
+
+    p = np.asarray(p, dtype=np.float64)
+    n = x.shape[0]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # A few stripes per worker balance the load, stripes start at a tile
+    stripe = -(-n // (workers * 4)) if workers > 1 else n
+    stripe = -(-stripe // tile_rows) * tile_rows
+    stripes = [(first, first + stripe if first + stripe < n else n) for first in range(0, n, stripe)]
+
+    if workers == 1 or len(stripes) == 1:
+        values = np.ascontiguousarray(np.asarray(x, dtype=np.float64).T)
+        flows = np.zeros((2,) + values.shape)
+        pairwise_stripe(values, p, d, 0, n, flows[0], flows[1])
+    else:
+        shape = (x.shape[1], n)
+        values_shm = SharedMemory(create=True, size=8 * shape[0] * shape[1])
+        flows_shm = SharedMemory(create=True, size=16 * shape[0] * shape[1])
+
+        try:
+            values = np.ndarray(shape, dtype=np.float64, buffer=values_shm.buf)
+            values[:] = np.asarray(x, dtype=np.float64).T
+            shared_flows = np.ndarray((2,) + shape, dtype=np.float64, buffer=flows_shm.buf)
+            shared_flows[:] = 0
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(pairwise_worker, values_shm.name, flows_shm.name, shape, p, d, first, last)
+                           for first, last in stripes]
+                for future in futures:
+                    future.result()
+
+            flows = shared_flows.copy()
+            del values, shared_flows
+        finally:
+            values_shm.close()
+            values_shm.unlink()
+            flows_shm.close()
+            flows_shm.unlink()
+
+    return ((flows[0] - flows[1]) / (n - 1)).astype(np.float32)
+
+def reference_tile_sums(x_rows, x_ref, p, d, w):
+    """Sum and sum of squares over the reference alternatives of the weighted net preference of every row.
+
+    Net preference of a over b is the sum over all criteria of w * (P(a - b) - P(b - a)), the sum over all
+    alternatives b divided by n - 1 is the net flow of a. Tiles of columns are reduced right away.
+
+    Args:
+        x_rows (ndarray): Values (criteria x rows).
+        x_ref (ndarray): Values (criteria x reference alternatives).
+        p (ndarray): Preference parameters (rows x criteria).
+        d (list): Preference function of every criterion.
+        w (ndarray): Weights of the criteria.
+
+    Returns:
+        tuple: (sums, sums of squares), arrays with one value per row.
+    """
+    n_rows, n_ref = x_rows.shape[1], x_ref.shape[1]
+    sums = np.zeros(n_rows)
+    squares = np.zeros(n_rows)
+
+    for row in range(0, n_rows, tile_rows):
+        rows = slice(row, row + tile_rows)
+
+        for col in range(0, n_ref, tile_cols):
+            cols = slice(col, col + tile_cols)
+            net = 0
+
+            for k in range(x_rows.shape[0]):
+                diff = x_rows[k, rows, None] - x_ref[k, None, cols]
+                net = net + w[k] * PreferenceValues(d[k], diff, p[:, k])
+                net -= w[k] * PreferenceValues(d[k], np.negative(diff, out=diff), p[:, k])
+
+            sums[rows] += net.sum(axis=1)
+            squares[rows] += np.square(net).sum(axis=1)
+
+    return sums, squares
+
+def PROMETHEESampledFlows(x, p, d, w, sample_size, top_k=0, sampling='random', confidence=0.95, seed=None):
+    """Approximate PROMETHEE II net flows against a sample of reference alternatives, in O(n * sample_size).
+
+    The net flow of an alternative is n / (n - 1) times the mean of its net preference over all alternatives,
+    the mean is estimated from the sample (without replacement). Confidence intervals follow from the sample
+    variance with the finite population correction. The top_k alternatives by the estimated net flows are then
+    computed exactly against all alternatives, so the head of the ranking is exact.
+
+    Args:
+        x (ndarray): Values (alternatives x criteria).
+        p (ndarray): Preference parameters (rows x criteria).
+        d (list): Preference function of every criterion.
+        w (ndarray): Weights of the criteria.
+        sample_size (int): Reference alternatives (all alternatives give the exact net flows).
+        top_k (int): Alternatives with the best estimated net flows which are computed exactly.
+        sampling (str): 'random' or 'stratified' (one alternative from each of sample_size strata of the
+            weighted sum of the values, the intervals of the random sample are then conservative).
+        confidence (float): Confidence level of the intervals.
+        seed: Seed of the random sample.
+
+    Returns:
+        tuple: (net flows, half widths of the confidence intervals (0 when exact), positions of the exact ones).
+    """
+    for f in d:
+        if f not in preference_functions:
+            raise ValueError("Unknown preference function %s, use one of %s" % (f, preference_functions))
+
+    n = x.shape[0]
+    values = np.ascontiguousarray(np.asarray(x, dtype=np.float64).T)
+    p = np.asarray(p, dtype=np.float64)
+    w = np.asarray(w, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+
+    if sample_size >= n:
+        sample = np.arange(n)
+    elif sampling == 'random':
+        sample = np.sort(rng.choice(n, size=sample_size, replace=False))
+    elif sampling == 'stratified':
+        order = np.argsort(w @ values, kind='stable')
+        sample = np.sort(order[((np.arange(sample_size) + rng.random(sample_size)) * n / sample_size).astype(np.intp)])
+    else:
+        raise ValueError("Unknown sampling %s, use 'random' or 'stratified'" % sampling)
+
+    m = len(sample)
+    sums, squares = reference_tile_sums(values, values[:, sample], p, d, w)
+
+    net_flows = sums / m * n / (n - 1)
+
+    # Sample variance of the net preferences and the finite population correction
+    variance = np.maximum(squares - sums * sums / m, 0) / (m - 1) if m > 1 else np.zeros(n)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    half_widths = z * np.sqrt(variance / m * (1 - m / n)) * n / (n - 1)
+
+    # Exact net flows of the top_k alternatives
+    refined = np.argsort(-net_flows, kind='stable')[:top_k] if m < n else np.arange(n)
+    if m < n and len(refined):
+        exact_sums, exact_squares = reference_tile_sums(values[:, refined], values, p, d, w)
+        net_flows[refined] = exact_sums / (n - 1)
+    half_widths[refined] = 0
+
+    return net_flows, half_widths, np.sort(refined)
+
+def uni_flows(x, p, c, f):
+    """Unicriterion net flows with the fastest exact engine for the values and the preference function.
+
+    Integer values with few levels use uni_cal_levels, other values use uni_cal_sorted for the piecewise
+    functions and PairwiseNetFlows for the Gaussian function. All engines put every pair on the same side of
+    the thresholds as PreferenceValues, the net flows differ only by the rounding of the sums.
+    """
+    if f not in preference_functions:
+        raise ValueError("Unknown preference function %s, use one of %s" % (f, preference_functions))
+
+    if uses_levels(x):
+        return uni_cal_levels(x, p, c, f)
+
+    if f in piecewise_functions:
+        return uni_cal_sorted(x, p, c, f)
+
+    return PairwiseNetFlows(x[:, None], np.asarray(p)[:, None], [f])[0]
+
+class PROMETHEEIncrementalFlows:
+    """
+    PROMETHEE II net flows of integer criteria which follow insertions and removals of alternatives.
+
+    Net flow of an alternative depends only on its levels and the level histograms of the criteria (uni_cal_levels).
+    An insertion or removal changes one count per criterion, so only the flows of the levels are computed again
+    (levels x levels per criterion) and the net flows of all alternatives are gathered from them in O(n * criteria).
+    The arithmetic is the same as in prometheeMC, so the net flows equal a full recompute.
+
+    :param values: Integer values (alternatives x criteria), e.g. of PROMETHEEReplaceValues.
+    :param index: IDs of the alternatives (None for the row numbers).
+    :param p: Preference parameters, None for the max and min values of the current alternatives
+        (PROMETHEEParameters), which follow the insertions and removals.
+    :param list d: Preference function of every criterion (None for linear).
+    :param w: Weights of the criteria.
+    """
+    def __init__(self, values, index=None, p=None, d=None, w=weights):
+        values = np.asarray(values)
+        if not np.issubdtype(values.dtype, np.integer):
+            raise ValueError("Incremental flows need integer values, not %s" % values.dtype)
+
+        # Values are kept by criterion (criteria x alternatives), so the levels of a criterion are contiguous
+        self.size, criteria = values.shape
+        self.columns = np.ascontiguousarray(values.T)
+        self.ids = list(range(self.size)) if index is None else list(index)
+        self.fixed_p = p
+        self.d = ['li'] * criteria if d is None else list(d)
+        self.w = w
+
+        # Counts of the levels offset, offset + 1, ... of every criterion
+        self.offset = int(np.min(values)) if values.size else 0
+        self.counts = np.zeros((criteria, int(np.max(values)) - self.offset + 1 if values.size else 1), dtype=np.int64)
+        for k in range(criteria):
+            self.counts[k] += np.bincount(values[:, k].astype(np.intp) - self.offset, minlength=self.counts.shape[1])
+
+        self.__net_flows = None
+
+    def __reserve(self, value):
+        # Levels of the counts cover the value
+        if value < self.offset:
+            self.counts = np.pad(self.counts, ((0, 0), (self.offset - value, 0)))
+            self.offset = value
+        elif value >= self.offset + self.counts.shape[1]:
+            self.counts = np.pad(self.counts, ((0, 0), (0, value - self.offset - self.counts.shape[1] + 1)))
+
+    def insert(self, values, id=None):
+        """Add an alternative and update the net flows.
+
+        :param values: Integer values of the alternative (criteria).
+        :param id: ID of the alternative (None for the next row number).
+        """
+        values = np.asarray(values, dtype=self.columns.dtype)
+        if values.shape != (self.counts.shape[0],):
+            raise ValueError("Alternative has %d values for %d criteria" % (values.size, self.counts.shape[0]))
+
+        for value in values:
+            self.__reserve(int(value))
+
+        # Capacity grows by doubling, so an insertion copies the values only now and then
+        if self.size == self.columns.shape[1]:
+            self.columns = np.concatenate([self.columns, np.empty((len(values), self.size or 1),
+                                                                  dtype=self.columns.dtype)], axis=1)
+
+        self.columns[:, self.size] = values
+        self.ids.append(self.size if id is None else id)
+        self.size += 1
+
+        self.counts[np.arange(len(values)), values.astype(np.intp) - self.offset] += 1
+        self.__net_flows = None
+
+    def remove(self, id):
+        """Remove the alternative with the ID and update the net flows (the order of the others is kept)."""
+        position = self.ids.index(id)
+        values = self.columns[:, position].copy()
+
+        self.columns[:, position:self.size - 1] = self.columns[:, position + 1:self.size]
+        del self.ids[position]
+        self.size -= 1
+
+        self.counts[np.arange(len(values)), values.astype(np.intp) - self.offset] -= 1
+        self.__net_flows = None
+
+    @property
+    def values(self):
+        # Values of the current alternatives (alternatives x criteria)
+        return self.columns[:, :self.size].T
+
+    @property
+    def p(self):
+        if self.fixed_p is not None:
+            return self.fixed_p
+
+        # Max and min level of every criterion which has alternatives (PROMETHEEParameters)
+        present = self.counts > 0
+        pv = self.offset + self.counts.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        nv = self.offset + np.argmax(present, axis=1)
+        return np.array([pv, nv], dtype='int8')
+
+    @property
+    def net_flows(self):
+        # Net flows of the current alternatives (computed once per update)
+        if self.__net_flows is None and self.size == 0:
+            self.__net_flows = np.zeros(0)
+        elif self.__net_flows is None:
+            p = self.p
+            values = self.columns[:, :self.size]
+            weighted_uni_net_flows = np.zeros((len(self.d), self.size))
+
+            for k in range(len(self.d)):
+                present = np.flatnonzero(self.counts[k])
+                first, last = present[0], present[-1] + 1
+                levels = np.arange(self.offset + first, self.offset + last)
+                flows = level_net_flows(levels, self.counts[k, first:last].astype(np.float32), p[:, k], self.d[k],
+                                        self.size)
+
+                weighted_uni_net_flows[k] = (self.w[k] * flows)[values[k].astype(np.intp) - self.offset - first]
+
+            self.__net_flows = np.round(np.sum(weighted_uni_net_flows, axis=0), decimals=4)
+
+        return self.__net_flows
+
+    @property
+    def ranks(self):
+        return RankScores(self.net_flows)
+
+    def to_frame(self):
+        return pd.DataFrame({'PROMETHEE': self.net_flows, 'Rank': self.ranks}, index=self.ids)
+
+def GAIAPlane(uni_net_flows, w, block_size=65536):
+    """GAIA plane: principal component analysis of the unicriterion net flows.
+
+    Net flows of every criterion sum to 0, so the flows are centred and the principal axes are the eigenvectors
+    of the criteria x criteria matrix of the flow products. The matrix is accumulated block by block of
+    alternatives, so the memory and the time grow linearly with the number of alternatives.
+
+    Args:
+        uni_net_flows (ndarray): Unicriterion net flows (criteria x alternatives), e.g. kept by prometheeMC.
+        w (ndarray): Weights of the criteria (the decision stick).
+        block_size (int): Alternatives in one block.
+
+    Returns:
+        tuple: (coordinates of the alternatives (alternatives x 2), criterion axes (criteria x 2),
+        decision stick (2), retained variance (share of the total variance in the plane)).
+    """
+    m, n = uni_net_flows.shape
+
+    gram = np.zeros((m, m))
+    for first in range(0, n, block_size):
+        block = np.asarray(uni_net_flows[:, first:first + block_size], dtype=np.float64)
+        gram += block @ block.T
+
+    # Two largest eigenvalues, the sign of every axis is set by its largest component
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    axes = eigenvectors[:, ::-1][:, :2].copy()
+    axes *= np.where(axes[np.argmax(np.abs(axes), axis=0), [0, 1]] < 0, -1, 1)
+
+    total = np.sum(eigenvalues)
+    retained_variance = float(np.sum(eigenvalues[-2:]) / total) if total > 0 else 1.0
+
+    coordinates = np.empty((n, 2))
+    for first in range(0, n, block_size):
+        coordinates[first:first + block_size] = np.asarray(uni_net_flows[:, first:first + block_size],
+                                                           dtype=np.float64).T @ axes
+
+    w = np.asarray(w, dtype=np.float64)
+    decision_stick = (w / np.sum(w)) @ axes
+
+    return coordinates, axes, decision_stick, retained_variance
+
 # === START OF THIRD-PARTY CODE ===
 def save_results_to_csv(results, filename):
     # Convert results to a DataFrame
@@ -154,97 +751,55 @@ def save_results_to_csv(results, filename):
 
 def main():
     filename = 'AHP_test.csv'  # load test sample (this is small sample of data for testing purposes)
-    #filename = 'TotalSKPData.csv'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+    #filename = 'TotalSKPData.skp'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+
+    verbosity = 'summary'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
 
     directory = './Results'
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-    TotalSKPData_df = pd.read_csv('./' + filename, index_col=0, delimiter=';')
-
-    index_array = TotalSKPData_df.index.to_numpy()
+    if filename.endswith('.skp'):
+        TotalSKPData_df = LoadSKPDataFrame('./' + filename)
+    else:
+        TotalSKPData_df = pd.read_csv('./' + filename, index_col=0, delimiter=';')
 
-    print("TotalSKPData dataframe:")
-    print(TotalSKPData_df)
-    print('-' * 58)
+    LogData("TotalSKPData dataframe:", TotalSKPData_df)
 
     # PROMETHEE II Ranking
-    print("PROMETHEE II RANKING:")
-    print('-' * 58)
+    LogMessage("PROMETHEE II RANKING:")
+    LogSeparator()
 
     TotalSKPData_RepVal = PROMETHEEReplaceValues(TotalSKPData_df)
-    print("TotalSKPData numeric dataframe:")
-    print(TotalSKPData_RepVal)
-    print('-' * 58)
+    LogData("TotalSKPData numeric dataframe:", TotalSKPData_RepVal)
 
-    # Convert the DataFrame to a NumPy array
-    TotalSKPData_np = TotalSKPData_RepVal.to_numpy(dtype='int8')
-    print(TotalSKPData_np)
-    print('-' * 58)
-    print("TotalSKPData_np datatype:")
-    print(TotalSKPData_np.dtype)
-    print('-' * 58)
+    # Unicriterion net flows are kept for the GAIA plane
+    uni_net_flows = np.empty((len(columns), len(TotalSKPData_RepVal)), dtype=np.float32)
 
-    # PROMETHEE II Ranking
-    print("PROMETHEE II RANKING:")
-    print('-' * 58)
+    PROMETHEERanking_df = GetPROMETHEERankingResults(TotalSKPData_RepVal, uni_net_flows)
 
-    # Weights of the criteria (global weights from the dexi model)
-    weights = array([9.82, 19.64, 4.42, 4.42, 13.68, 13.68, 4.56, 7.15, 4.77, 0, 4.47, 2.23, 2.23, 7.31, 1.62],
-                    dtype='float16')
+    # Print final ranking
+    LogRanking('PROMETHEE final ranking results:', PROMETHEERanking_df)
 
-    # Print weights of the criteria
-    print('')
-    print('Weights of the criteria')
-    print(weights)
-    print('-' * 58)
-
-    # Maximum and minimum values for each criterion
-    pv = array(amax(TotalSKPData_np, axis=0), dtype='int8')
-    nv = array(amin(TotalSKPData_np, axis=0), dtype='int8')
-
-    # Print the maximum values for each criterion
-    print('')
-    print('Maximum values for each criterion:')
-    print(pv)
-
-    # Print the minimum values for each criterion
-    print('')
-    print('Minimum values for each criterion:')
-    print(nv)
-    print('-' * 58)
+    PROMETHEERanking_df.to_csv(directory + '/PROMETHEE_Results.csv', sep=';', index=True, header=True,
+                               index_label='alternatives')
 
-    # preference parameters of all criteria array
-    p = array([pv, nv], dtype='int8')
+    p, c, d = PROMETHEEParameters(TotalSKPData_RepVal.to_numpy(dtype='int8'))
 
-    # Print the preference parameters of all criteria array
-    print('')
-    print('Preference parameters of all criteria array:')
-    print(p)
-    print('-' * 58)
-
-    # Criteria optimization array (0 for min, 1 for max)
-    c = np.ones(TotalSKPData_np.shape[1], dtype=int8)
+    results = ResultStore(GetResultStorePath(directory, filename), ids=PROMETHEERanking_df.index)
+    results.write('PROMETHEE', PROMETHEERanking_df['PROMETHEE'], {'weights': weights, 'p': p, 'c': c, 'd': d,
+                                                                 'values': replacement_maps_topsis})
 
-    # Preference function array
-    d = ['li'] * TotalSKPData_np.shape[1]
-
-    print('')
-    print('Preference function array:')
-    print(d)
-    print('-' * 58)
-
-    # final results
-    final_net_flows = prometheeMC(TotalSKPData_np, p, c, d, weights)
+    # GAIA plane (coordinates of the alternatives, criterion axes and the decision stick) for plotting
+    coordinates, axes, decision_stick, retained_variance = GAIAPlane(uni_net_flows, weights)
 
-    with open('./Results/PROMETHEE_Results.csv', 'w') as f:
-        f.write('alternatives;PROMETHEE')
-        f.write('\n')
+    LogMessage('GAIA plane retains %.1f %% of the variance of the unicriterion net flows' % (retained_variance * 100))
+    LogData('GAIA criterion axes:', pd.DataFrame(axes, index=columns, columns=['u', 'v']))
+    LogData('GAIA decision stick:', decision_stick)
 
-        for i in range(0, len(final_net_flows)):
-            print(str(index_array[i]) + ': ' + str(final_net_flows[i]))
-            f.write(str(index_array[i]) + ';' + str(final_net_flows[i]))
-            f.write('\n')
+    results.write_data('GAIA', coordinates, {'columns': ['u', 'v'], 'criteria': columns, 'axes': axes,
+                                             'decision stick': decision_stick, 'retained variance': retained_variance})
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
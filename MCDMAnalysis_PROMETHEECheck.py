@@ -0,0 +1,46 @@
+#Check of the PROMETHEE net flow engines against the preferences of all pairs (PreferenceValues)
+#Run this code after a change of uni_cal_sorted, the ranking script MCDMAnalysis_PROMETHEE.py does not run it
+import pandas as pd
+import numpy as np
+
+from MCDMAnalysis_PROMETHEE import uni_cal_sorted, PairwiseNetFlows, piecewise_functions
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogData, SetVerbosity
+
+
+def CheckSortedFlows(n=3000, step=0.1, p=(0.3, 0.7, 0.5), seed=0, tolerance=1e-5):
+    """Compare uni_cal_sorted with the preferences of all pairs (PreferenceValues) on values of a decimal grid.
+
+    Differences of grid values land exactly on the grid thresholds up to the rounding of the floats,
+    which puts boundary pairs on the wrong side when the thresholds are not tested on the differences.
+
+    Returns:
+        Series: Largest net flow difference of every piecewise preference function.
+    """
+    x = np.round(np.random.default_rng(seed).integers(0, 60, n) * step, 10)
+    p = np.asarray(p, dtype=np.float64)
+
+    errors = pd.Series({f: float(np.max(np.abs(uni_cal_sorted(x, p, 0, f) -
+                                               PairwiseNetFlows(x[:, None], p[:, None], [f], workers=1)[0])))
+                        for f in piecewise_functions})
+
+    if np.any(errors > tolerance):
+        raise ValueError("Sorted net flows differ from the pairwise net flows by %s" % errors.to_dict())
+
+    return errors
+
+
+def main():
+    verbosity = 'full'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
+
+    LogMessage("PROMETHEE SORTED ENGINE CHECK:")
+    LogSeparator()
+
+    # Decimal grids and thresholds on the grid (raises on a mismatch)
+    for step, p in [(0.1, (0.3, 0.7, 0.5)), (0.01, (0.1, 0.2, 0.5)), (0.05, (0.0, 0.5, 0.5))]:
+        LogData('Largest net flow differences of the sorted engine (step %s, q and p %s):' % (step, p[:2]),
+                CheckSortedFlows(step=step, p=p))
+
+
+if __name__ == '__main__':
+    main()
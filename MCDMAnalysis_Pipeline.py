@@ -0,0 +1,162 @@
+#Streaming ranking pipeline: the dataset is read, encoded, scored and written in chunks,
+#so the memory used does not grow with the size of the dataset (AHP_test.csv or the complete TotalSKPData.skp)
+import pandas as pd
+import numpy as np
+import os
+
+from MCDMAnalysis_Codebook import columns, EncodeSKPData, EncodeValues, LoadSKPDataset
+from MCDMAnalysis_ResultStore import ResultStore, GetResultStorePath
+from MCDMAnalysis_AHP import replacement_maps, calculate_criteria_relative_values, GetAHPEngine
+from MCDMAnalysis_TOPSIS import replacement_maps_topsis, weights as weights_topsis, TOPSISStreamingScores
+from MCDMAnalysis_PAPRIKA import replacement_maps_paprika
+from MCDMAnalysis_DEX import GetDEXRankingResults, dex_model_file
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogRanking, SetVerbosity
+
+
+def ReadSKPChunks(filename, chunksize=65536):
+    """Yield the alternatives of a dataset (columnar .skp or ';' delimited CSV) in chunks.
+
+    Yields:
+        tuple: (index of the chunk, int8 array (alternatives x criteria) of category codes).
+    """
+    if filename.endswith('.skp'):
+        codes, index = LoadSKPDataset(filename)
+        for first in range(0, len(index), chunksize):
+            yield index[first:first + chunksize], codes[first:first + chunksize]
+    else:
+        for chunk in pd.read_csv(filename, index_col=0, delimiter=';', chunksize=chunksize):
+            yield chunk.index, EncodeSKPData(chunk)
+
+
+def ReadCSVChunks(filename, chunksize=65536):
+    # Chunks of a ';' delimited CSV dataset as they are (DEX attributes are not in the SKP codebook)
+    if filename.endswith('.skp'):
+        raise ValueError("DEX model attributes are not in the columnar dataset %s" % filename)
+
+    for chunk in pd.read_csv(filename, index_col=0, delimiter=';', chunksize=chunksize):
+        yield chunk.index, chunk
+
+
+def ReadIndex(filename, chunksize=65536):
+    # IDs of the alternatives (only the index column of a CSV dataset is read)
+    if filename.endswith('.skp'):
+        return LoadSKPDataset(filename)[1]
+
+    index = [chunk.index for chunk in pd.read_csv(filename, index_col=0, usecols=[0], delimiter=';',
+                                                  chunksize=chunksize)]
+    return index[0].append(index[1:]) if index else pd.Index([])
+
+
+def AHPColumnMax(filename, chunksize=65536):
+    # Pre-pass: max value of each criterion over all alternatives (AHP divides by the max of the weighted values)
+    max_values = np.full(len(columns), -np.inf)
+
+    for index, codes in ReadSKPChunks(filename, chunksize):
+        max_values = np.maximum(max_values, EncodeValues(codes, replacement_maps, np.float64).max(axis=0))
+
+    return max_values
+
+
+def StreamAHPScores(filename, chunksize=65536):
+    # AHP engine with the column max values from the pre-pass
+    engine = GetAHPEngine()
+    max_weighted = AHPColumnMax(filename, chunksize) * engine.weights
+
+    for index, codes in ReadSKPChunks(filename, chunksize):
+        yield index, engine.score(EncodeValues(codes, replacement_maps, np.float64), max_weighted)
+
+
+def StreamTOPSISScores(filename, chunksize=65536):
+    # Two-pass TOPSIS, the first pass gives the norms and ideal solutions (same scores as GetTOPSISRankingResults)
+    def read_chunks():
+        for index, codes in ReadSKPChunks(filename, chunksize):
+            yield index, EncodeValues(codes, replacement_maps_topsis, np.int8)
+
+    return TOPSISStreamingScores(read_chunks)
+
+
+def StreamPAPRIKAScores(filename, chunksize=65536):
+    # PAPRIKA score is the sum of the points of the row
+    for index, codes in ReadSKPChunks(filename, chunksize):
+        yield index, EncodeValues(codes, replacement_maps_paprika, np.float64).sum(axis=1)
+
+
+def StreamDEXScores(filename, chunksize=65536):
+    # DEX model evaluates all rows of the chunk at once
+    for index, chunk in ReadCSVChunks(filename, chunksize):
+        yield index, GetDEXRankingResults(chunk)['DEX'].to_numpy(dtype=np.float64)
+
+
+stream_functions = {
+    'AHP': StreamAHPScores,
+    'TOPSIS': StreamTOPSISScores,
+    'PAPRIKA': StreamPAPRIKAScores,
+    'DEX': StreamDEXScores
+}
+
+method_params = {
+    'AHP': {'CritRV': calculate_criteria_relative_values(), 'values': replacement_maps},
+    'TOPSIS': {'weights': weights_topsis, 'values': replacement_maps_topsis},
+    'PAPRIKA': {'values': replacement_maps_paprika},
+    'DEX': {'model': dex_model_file}
+}
+
+
+def write_csv_chunks(chunks, method, path):
+    # Append every chunk of scores to the CSV results (same layout as the ranking scripts) and pass the scores on
+    header = True
+
+    for index, scores in chunks:
+        pd.DataFrame({method: scores}, index=index).to_csv(path, sep=';', mode='w' if header else 'a',
+                                                            index=True, header=header)
+        header = False
+
+        yield scores
+
+
+def RunStreamingMethod(method, filename, directory, chunksize=65536):
+    """Rank a dataset with one method chunk by chunk.
+
+    Scores are written to <directory>/<method>_Results.csv and to the result store of the dataset.
+
+    Returns:
+        ResultStore: Result store with the scores and ranks of the method.
+    """
+    results = ResultStore(GetResultStorePath(directory, filename), ids=ReadIndex(filename, chunksize))
+
+    chunks = stream_functions[method](filename, chunksize)
+    results.write_chunks(method, write_csv_chunks(chunks, method, directory + '/' + method + '_Results.csv'),
+                         method_params[method])
+
+    return results
+
+
+def main():
+    filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
+    #filename = 'TotalSKPData.skp'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+    methods = ['AHP', 'TOPSIS', 'PAPRIKA']
+
+    #filename = 'Project_manager.csv'  #DEX model attributes of the job position
+    #methods = ['DEX']
+
+    # Number of alternatives in memory at once
+    chunksize = 65536
+
+    verbosity = 'summary'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
+
+    directory = './Results'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    for method in methods:
+        LogMessage(method + " RANKING (streaming):")
+        LogSeparator()
+
+        results = RunStreamingMethod(method, './' + filename, directory, chunksize)
+
+        LogRanking(method + ' final ranking results:', results.to_frame([method]))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,8 @@ import matplotlib.pyplot as plt
 from rbo import RankingSimilarity
 from scipy.stats import rankdata
 
+from MCDMAnalysis_ResultStore import ResultStore
+
 def Create_Heatmap(DataFrameMatrix: pd.DataFrame, Method, Path, name, Cmap):
     index_labels = ['DEX', 'AHP', 'TOPSIS', 'PROMETHEE', 'PAPRIKA']
 
@@ -72,11 +74,23 @@ TOPSISRanking = 'TOPSIS_Results.csv'
 PROMETHEERanking = 'PROMETHEE_Results.csv'
 PAPRIKARanking = 'PAPRIKA_Results.csv'
 
-DEXRanking_df = pd.read_csv('./Results/' + DEXRanking, index_col=0, delimiter=';').reset_index(drop=True)
-AHPRanking_df = pd.read_csv('./Results/' + AHPRanking, index_col=0, delimiter=';').reset_index(drop=True)
-TOPSISRanking_df = pd.read_csv('./Results/' + TOPSISRanking, index_col=0, delimiter=';').reset_index(drop=True)
-PROMETHEERanking_df = pd.read_csv('./Results/' + PROMETHEERanking, index_col=0, delimiter=';').reset_index(drop=True)
-PAPRIKARanking_df = pd.read_csv('./Results/' + PAPRIKARanking, index_col=0, delimiter=';').reset_index(drop=True)
+# Or load all rankings from the result store written by the ranking scripts
+results_store = None
+#results_store = directory + '/AHP_test.results'
+
+if results_store is not None:
+    results = ResultStore(results_store)
+    DEXRanking_df = results.to_frame(['DEX']).reset_index(drop=True)
+    AHPRanking_df = results.to_frame(['AHP']).reset_index(drop=True)
+    TOPSISRanking_df = results.to_frame(['TOPSIS']).reset_index(drop=True)
+    PROMETHEERanking_df = results.to_frame(['PROMETHEE']).reset_index(drop=True)
+    PAPRIKARanking_df = results.to_frame(['PAPRIKA']).reset_index(drop=True)
+else:
+    DEXRanking_df = pd.read_csv('./Results/' + DEXRanking, index_col=0, delimiter=';').reset_index(drop=True)
+    AHPRanking_df = pd.read_csv('./Results/' + AHPRanking, index_col=0, delimiter=';').reset_index(drop=True)
+    TOPSISRanking_df = pd.read_csv('./Results/' + TOPSISRanking, index_col=0, delimiter=';').reset_index(drop=True)
+    PROMETHEERanking_df = pd.read_csv('./Results/' + PROMETHEERanking, index_col=0, delimiter=';').reset_index(drop=True)
+    PAPRIKARanking_df = pd.read_csv('./Results/' + PAPRIKARanking, index_col=0, delimiter=';').reset_index(drop=True)
 
 # Sort and export DataFrame to a csv file
 DEXRankingScores_desc = DEXRanking_df.sort_values(by='DEX', ascending=False)
@@ -0,0 +1,195 @@
+#Unified store of the ranking results of all MCDM methods for one dataset
+import pandas as pd
+import numpy as np
+import os
+import json
+
+from scipy.stats import rankdata
+
+ids_file = 'ids.npy'
+meta_file = 'meta.json'
+
+
+def GetResultStorePath(directory, filename):
+    # Result store of a dataset, e.g. ./Results/AHP_test.results for AHP_test.csv or AHP_test.skp
+    return os.path.join(directory, os.path.splitext(os.path.basename(filename))[0] + '.results')
+
+
+def RankScores(scores):
+    # Ranking places (1 is the best), the highest score is the best and ties share the best place
+    return rankdata(-np.asarray(scores, dtype=float), method='min').astype(np.int32)
+
+
+def stored_ids(ids):
+    # IDs as they are saved in the store (object IDs, e.g. of a pandas index, are saved as strings)
+    ids = np.asarray(ids)
+    if ids.dtype == object:
+        ids = ids.astype(str)
+
+    return ids
+
+
+class ResultStore:
+    """
+    Ranking results of all methods for one dataset.
+
+    The store is a directory with the IDs of the alternatives, one memory mapped score column and
+    one rank column per method and the metadata with the method parameters.
+    Alternatives are keyed by their integer position (row number of the dataset).
+    Writing a method only writes its own columns and metadata.
+    Other data of the alternatives (e.g. GAIA plane coordinates) is kept next to the methods.
+
+    :param str path: Directory of the store.
+    :param ids: IDs of the alternatives. Needed only when the store is created.
+    """
+    def __init__(self, path, ids=None):
+        self.path = path
+
+        if os.path.isfile(os.path.join(path, meta_file)):
+            self.__read_meta()
+
+            if ids is not None and len(ids) != self.meta['rows']:
+                raise ValueError("Store %s has %d alternatives and not %d" % (path, self.meta['rows'], len(ids)))
+
+            # Scores are keyed by row number, so the rows must be the same alternatives as in the store
+            if ids is not None and not np.array_equal(stored_ids(ids), np.load(os.path.join(path, ids_file))):
+                raise ValueError("Store %s has other alternatives than the %d given IDs" % (path, len(ids)))
+        else:
+            if ids is None:
+                raise ValueError("Store %s does not exist, IDs of the alternatives are needed to create it" % path)
+
+            ids = stored_ids(ids)
+
+            os.makedirs(path, exist_ok=True)
+            np.save(os.path.join(path, ids_file), ids)
+            self.meta = {'rows': len(ids), 'methods': {}}
+            self.__write_meta()
+
+    def __read_meta(self):
+        with open(os.path.join(self.path, meta_file)) as f:
+            self.meta = json.load(f)
+
+    def __write_meta(self):
+        tmp = os.path.join(self.path, meta_file + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, meta_file))
+
+    def __column_file(self, method, kind):
+        return os.path.join(self.path, '%s.%s.npy' % (method, kind))
+
+    @property
+    def methods(self):
+        return list(self.meta['methods'].keys())
+
+    @property
+    def index(self):
+        return pd.Index(np.load(os.path.join(self.path, ids_file)))
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def params(self, method):
+        return self.meta['methods'][method]
+
+    def write(self, method, scores, params=None):
+        """Write scores and ranks of one method (replaces the earlier results of the same method).
+
+        :param str method: Name of the method, e.g. 'AHP'.
+        :param scores: Scores of the alternatives in the row order of the dataset.
+        :param dict params: JSON serialisable parameters of the method (numpy arrays are converted to lists).
+        """
+        scores = np.asarray(scores, dtype=np.float64).ravel()
+        if len(scores) != len(self):
+            raise ValueError("%s has %d scores for %d alternatives" % (method, len(scores), len(self)))
+
+        np.save(self.__column_file(method, 'score'), scores)
+        np.save(self.__column_file(method, 'rank'), RankScores(scores))
+
+        self.__write_params(method, params)
+
+    def write_chunks(self, method, chunks, params=None):
+        """Write scores of one method chunk by chunk, e.g. from a streaming pipeline.
+
+        Scores are written to a temporary memory mapped column as they arrive. Only the ranks, which are
+        computed after the last chunk, need the whole column. The columns of an earlier write of the method
+        are replaced only when all scores have been written.
+
+        :param str method: Name of the method, e.g. 'AHP'.
+        :param chunks: Iterable of score arrays, in the row order of the dataset.
+        :param dict params: JSON serialisable parameters of the method (numpy arrays are converted to lists).
+        """
+        score_file = self.__column_file(method, 'score')
+        rank_file = self.__column_file(method, 'rank')
+
+        try:
+            scores = np.lib.format.open_memmap(score_file + '.tmp', mode='w+', dtype=np.float64, shape=(len(self),))
+            first = 0
+
+            for chunk in chunks:
+                chunk = np.asarray(chunk, dtype=np.float64).ravel()
+                if first + len(chunk) > len(self):
+                    raise ValueError("%s has more scores than %d alternatives" % (method, len(self)))
+
+                scores[first:first + len(chunk)] = chunk
+                first += len(chunk)
+
+            if first != len(self):
+                raise ValueError("%s has %d scores for %d alternatives" % (method, first, len(self)))
+
+            scores.flush()
+            with open(rank_file + '.tmp', 'wb') as f:
+                np.save(f, RankScores(scores))
+            del scores
+        except BaseException:
+            for tmp in (score_file + '.tmp', rank_file + '.tmp'):
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            raise
+
+        os.replace(score_file + '.tmp', score_file)
+        os.replace(rank_file + '.tmp', rank_file)
+
+        self.__write_params(method, params)
+
+    def write_data(self, name, values, params=None):
+        """Write other data of the alternatives, e.g. the GAIA plane coordinates (replaces the earlier data).
+
+        :param str name: Name of the data, e.g. 'GAIA'.
+        :param values: Array with one row per alternative in the row order of the dataset.
+        :param dict params: JSON serialisable description of the data (numpy arrays are converted to lists).
+        """
+        values = np.asarray(values)
+        if len(values) != len(self):
+            raise ValueError("%s has %d rows for %d alternatives" % (name, len(values), len(self)))
+
+        np.save(self.__column_file(name, 'data'), values)
+
+        self.__write_params(name, params, 'data')
+
+    def __write_params(self, method, params, section='methods'):
+        # Other methods might have been written since the store was opened
+        self.__read_meta()
+        self.meta.setdefault(section, {})[method] = {k: (v.tolist() if isinstance(v, np.ndarray) else v)
+                                                     for k, v in (params or {}).items()}
+        self.__write_meta()
+
+    def score(self, method):
+        return np.load(self.__column_file(method, 'score'), mmap_mode='r')
+
+    def rank(self, method):
+        return np.load(self.__column_file(method, 'rank'), mmap_mode='r')
+
+    def data(self, name):
+        return np.load(self.__column_file(name, 'data'), mmap_mode='r')
+
+    def data_params(self, name):
+        return self.meta.get('data', {})[name]
+
+    def to_frame(self, methods=None, ranks=False):
+        # Scores (or ranks) of the methods as a DataFrame with one column per method
+        if methods is None:
+            methods = self.methods
+
+        column = self.rank if ranks else self.score
+        return pd.DataFrame({method: column(method) for method in methods}, index=self.index)
@@ -1,32 +1,85 @@
-#Run this code to generate TotalSKPData.csv (dataset containing alternatives with all possibilities)
-import pandas as pd
-import itertools
-
-#Generate dataframe with all possible options
-# Define lists
-c1 = ['small', 'medium', 'large']
-c2 = ['>10', '5 - 10', '< 5 new competences']
-c3 = ['no', 'yes']
-c4 = ['no', 'yes']
-c5 = ['no', 'yes']
-c6 = ['no', 'yes']
-c7 = ['no', 'yes']
-c8 = ['part time', 'full time', 'not important']
-c9 = ['part time', 'full time']
-c10 = ['downgrade', 'same', 'not important', 'upgrade career']
-c11 = ['down', 'same', 'up']
-c12 = ['daily/night shift', 'two-shift', 'afternoon shift', 'morning shift']
-c13 = ['daily/night shift', 'two-shift', 'afternoon shift', 'morning shift']
-c14 = ['> 20 km', '10 - 20 km', '< 10 km']
-c15 = ['no', 'yes']
-
-# Create a list of your lists
-lists = [c1, c2, c3, c4, c5, c6, c7, c8, c9, c10, c11, c12, c13, c14, c15]
-
-# Generate all combinations
-AlternativesAll = pd.DataFrame(list(itertools.product(*lists)), columns=['Available positions', 'SKPvsESCO', 'Languages', 'Driving license', 'Age appropriateness', 'Disability appropriateness', 'SKP Wish', 'JS wishes for contract type', 'Job contract type', 'JS career wishes', 'Job career advancement', 'Job working hours', 'JS working hours wishes', 'Distance to job position', 'JS wish location'])
-
-# Save the DataFrame to an CSV file
-file_name = './TotalSKPData.csv'
-AlternativesAll.to_csv(file_name)
-print('DataFrame is written to CSV File successfully.')
\ No newline at end of file
+#Run this code to generate TotalSKPData.skp (dataset containing alternatives with all possibilities)
+import numpy as np
+
+from MCDMAnalysis_Codebook import columns, criteria_levels, CreateSKPDataset
+
+#Generate dataset with all possible options
+# Create a list of the criteria categories
+lists = [criteria_levels[col] for col in columns]
+
+# A row index is a mixed-radix number with one digit (category code) per criterion.
+# The last criterion changes fastest, which is the same row order as itertools.product(*lists).
+radices = np.array([len(c) for c in lists], dtype=np.int64)
+strides = np.append(np.cumprod(radices[:0:-1])[::-1], 1)
+
+
+def SKPDataSize():
+    # Number of alternatives in the complete dataset
+    return int(np.prod(radices))
+
+
+def IndexToCodes(index):
+    """Map row indices of the complete dataset to category codes.
+
+    Args:
+        index (ndarray): Row indices in range [0, SKPDataSize()).
+
+    Returns:
+        ndarray: int8 array (len(index) x 15) of category codes.
+    """
+    index = np.asarray(index, dtype=np.int64)
+    return ((index[:, None] // strides) % radices).astype(np.int8)
+
+
+def GenerateSKPDataCodes(chunk_size=65536, start=0, stop=None):
+    """Yield the complete dataset (or the [start, stop) slice of it) in chunks of category codes.
+
+    Args:
+        chunk_size (int): Maximum number of rows in one chunk.
+        start (int): First row index of the slice.
+        stop (int): Row index after the last row of the slice (None for the end of the dataset).
+
+    Yields:
+        tuple: (row index of the first row in the chunk, int8 array of category codes).
+    """
+    if stop is None:
+        stop = SKPDataSize()
+
+    if not 0 <= start <= stop <= SKPDataSize():
+        raise ValueError("Invalid slice [%d, %d) of the dataset with %d rows" % (start, stop, SKPDataSize()))
+
+    for first in range(start, stop, chunk_size):
+        last = min(first + chunk_size, stop)
+        yield first, IndexToCodes(np.arange(first, last))
+
+
+def WriteSKPData(path, chunk_size=65536, start=0, stop=None):
+    # Write the [start, stop) slice of the dataset as a columnar dataset, one chunk at a time
+    if stop is None:
+        stop = SKPDataSize()
+
+    codes = CreateSKPDataset(path, stop - start, start=start)
+
+    for first, chunk in GenerateSKPDataCodes(chunk_size, start, stop):
+        codes[first - start:first - start + len(chunk)] = chunk
+
+    codes.flush()
+
+    return path
+
+
+def main():
+    chunk_size = 65536
+
+    # Generate all combinations (for sharding set start and stop to the slice of the row indices)
+    start = 0
+    stop = SKPDataSize()
+
+    # Save the category codes to a columnar dataset
+    path = './TotalSKPData.skp'
+    WriteSKPData(path, chunk_size, start, stop)
+    print('Dataset with ' + str(stop - start) + ' alternatives is written to ' + path + ' successfully.')
+
+
+if __name__ == '__main__':
+    main()
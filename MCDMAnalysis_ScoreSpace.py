@@ -0,0 +1,158 @@
+#Score distribution and rank lookup over the complete dataset (all combinations of criteria categories)
+#for the additive methods (AHP and PAPRIKA), without generating the dataset
+import pandas as pd
+import numpy as np
+import heapq
+
+from MCDMAnalysis_Codebook import columns, criteria_levels, EncodeSKPData
+from MCDMAnalysis_SKPdata import SKPDataSize
+from MCDMAnalysis_AHP import replacement_maps, calculate_criteria_relative_values
+from MCDMAnalysis_PAPRIKA import replacement_maps_paprika
+
+
+class AdditiveScoreSpace:
+    """
+    Score of an alternative is a sum of per-criterion contributions, so the score histogram of the
+    complete dataset is a convolution of the per-criterion contribution histograms.
+
+    :param contributions: One array per criterion with the contribution of each category code.
+    :param int decimals: Contributions are rounded to this number of decimals and summed as integers,
+        so every sum is exact and equal scores always end up in the same histogram bin.
+    """
+    def __init__(self, contributions, decimals=10):
+        self.decimals = decimals
+        self.contributions = [np.round(np.asarray(c, dtype=float) * 10 ** decimals).astype(np.int64)
+                              for c in contributions]
+
+        # Convolve per-criterion histograms (each category appears once per combination of the others)
+        scores = np.zeros(1, dtype=np.int64)
+        counts = np.ones(1, dtype=np.int64)
+
+        for contribution in self.contributions:
+            sums = (scores[:, None] + contribution[None, :]).ravel()
+            scores, inverse = np.unique(sums, return_inverse=True)
+            counts = np.bincount(inverse, weights=np.repeat(counts, len(contribution))).astype(np.int64)
+
+        self.scores = scores
+        self.counts = counts
+        # Number of combinations with a score higher than scores[i]
+        self.higher = np.sum(counts) - np.cumsum(counts)
+
+    def histogram(self):
+        # Distinct scores (ascending) and the number of combinations with each score
+        return self.scores / 10 ** self.decimals, self.counts
+
+    def __score(self, codes):
+        codes = np.atleast_2d(codes)
+        total = np.zeros(codes.shape[0], dtype=np.int64)
+
+        for j, contribution in enumerate(self.contributions):
+            total += contribution[codes[:, j]]
+
+        return total
+
+    def score(self, codes):
+        # Scores of the alternatives given as category codes (n x criteria)
+        return self.__score(codes) / 10 ** self.decimals
+
+    def rank(self, codes):
+        """Exact rank of the alternatives among all combinations.
+
+        Rank is 1 + the number of combinations with a higher score (ties share the best rank).
+
+        :param codes: Category codes of the alternatives (n x criteria).
+        :return: Ranks (n) in range [1, number of combinations].
+        """
+        ind = np.searchsorted(self.scores, self.__score(codes), side='right')
+        higher = np.append(self.higher, np.sum(self.counts))[ind - 1]
+
+        return higher + 1
+
+    def top_k(self, k):
+        """The k combinations with the highest scores.
+
+        Best first search over the combinations: categories of every criterion are sorted by
+        contribution (descending) and a combination is expanded only by moving criteria which
+        are not before the last moved one, so every combination is visited once.
+
+        :return: Category codes (k x criteria) and the scores (k), best first.
+        """
+        orders = [np.argsort(-c, kind='stable') for c in self.contributions]
+        values = [c[o] for c, o in zip(self.contributions, orders)]
+        m = len(values)
+
+        start = (0,) * m
+        heap = [(-sum(v[0] for v in values), 0, start, 0)]
+        counter = 1
+        top_codes = []
+        top_scores = []
+
+        while heap and len(top_codes) < k:
+            neg_score, _, pos, last = heapq.heappop(heap)
+            top_codes.append([orders[j][pos[j]] for j in range(m)])
+            top_scores.append(-neg_score)
+
+            for j in range(last, m):
+                if pos[j] + 1 < len(values[j]):
+                    child = pos[:j] + (pos[j] + 1,) + pos[j + 1:]
+                    child_score = -neg_score - values[j][pos[j]] + values[j][pos[j] + 1]
+                    heapq.heappush(heap, (-child_score, counter, child, j))
+                    counter += 1
+
+        return np.array(top_codes, dtype=np.int8).reshape(-1, m), np.array(top_scores) / 10 ** self.decimals
+
+
+def GetAHPScoreSpace(value_maps=replacement_maps, CritRV=None, decimals=10):
+    # AHP score is sum of CritRV * value / max value of the criterion.
+    # In the complete dataset every category is present, so the max value is the max of the map.
+    if CritRV is None:
+        CritRV = calculate_criteria_relative_values()
+
+    contributions = []
+    for col, weight in zip(columns, CritRV):
+        values = np.array([value_maps[col][level] for level in criteria_levels[col]], dtype=float)
+        max_val = np.max(values)
+        contributions.append(values / max_val * weight if max_val != 0 else np.zeros(len(values)))
+
+    return AdditiveScoreSpace(contributions, decimals)
+
+
+def GetPAPRIKAScoreSpace(value_maps=replacement_maps_paprika, decimals=10):
+    # PAPRIKA score is the sum of the points
+    contributions = [np.array([value_maps[col][level] for level in criteria_levels[col]], dtype=float)
+                     for col in columns]
+
+    return AdditiveScoreSpace(contributions, decimals)
+
+
+def main():
+    filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
+
+    TotalSKPData_df = pd.read_csv('./' + filename, index_col=0, delimiter=';')
+
+    # Category codes of the alternatives
+    codes = EncodeSKPData(TotalSKPData_df)
+
+    print('Number of all possible alternatives: ' + str(SKPDataSize()))
+    print('-' * 58)
+
+    for name, space in [('AHP', GetAHPScoreSpace()), ('PAPRIKA', GetPAPRIKAScoreSpace())]:
+        scores, counts = space.histogram()
+        print(name + ' distinct scores in the complete dataset: ' + str(len(scores)))
+
+        top_codes, top_scores = space.top_k(10)
+        top_df = pd.DataFrame([[criteria_levels[col][c] for col, c in zip(columns, row)] for row in top_codes],
+                              columns=columns)
+        top_df[name] = top_scores
+        print(name + ' top 10 alternatives of the complete dataset:')
+        print(top_df)
+
+        RankInSpace_df = pd.DataFrame({name: space.score(codes), 'Rank': space.rank(codes)},
+                                      index=TotalSKPData_df.index)
+        print(name + ' rank of the alternatives among all possible alternatives:')
+        print(RankInSpace_df)
+        print('-' * 58)
+
+
+if __name__ == '__main__':
+    main()
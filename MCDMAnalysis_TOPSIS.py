@@ -5,191 +5,328 @@
 
 import pandas as pd
 import os
-from numpy import *
-
-col_available_positions = 'Available positions'
-col_skp_vs_esco = 'SKPvsESCO'
-col_languages = 'Languages'
-col_driving_license = 'Driving license'
-col_age = 'Age appropriateness'
-col_disability = 'Disability appropriateness'
-col_skp_wish = 'SKP Wish'
-col_js_contract_wish = 'JS wishes for contract type'
-col_job_contract = 'Job contract type'
-col_js_career = 'JS career wishes'
-col_job_advancement = 'Job career advancement'
-col_job_hours = 'Job working hours'
-col_js_hours = 'JS working hours wishes'
-col_distance = 'Distance to job position'
-col_location = 'JS wish location'
+import numpy as np
+
+from MCDMAnalysis_Codebook import (col_available_positions, col_skp_vs_esco, col_languages, col_driving_license,
+                                   col_age, col_disability, col_skp_wish, col_js_contract_wish, col_job_contract,
+                                   col_js_career, col_job_advancement, col_job_hours, col_js_hours, col_distance,
+                                   col_location, columns, LoadSKPDataFrame, EncodeValues)
+from MCDMAnalysis_ResultStore import ResultStore, GetResultStorePath, RankScores
+from MCDMAnalysis_Log import LogMessage, LogSeparator, LogData, LogRanking, SetVerbosity
+
+# Quantitative values of the qualitative categories
+# Simply begin with 1 for the lowest category and for each more valuable increase value by 1
+map_three_topsis = {'small': 1, 'medium': 2, 'large': 3}
+map_competences_topsis = {'>10': 1, '5 - 10': 2, '< 5 new competences': 3}
+map_yes_no_topsis = {'no': 1, 'yes': 2}
+map_part_full_topsis = {'part time': 1, 'full time': 2, 'not important': 3}
+map_contract_topsis = {'part time': 1, 'full time': 2}
+map_career_topsis = {'downgrade': 1, 'same': 2, 'not important': 3, 'upgrade career': 4}
+map_advancement_topsis = {'down': 1, 'same': 2, 'up': 3}
+map_hours_topsis = {'daily/night shift': 1, 'two-shift': 2, 'afternoon shift': 3, 'morning shift': 4}
+map_distance_topsis = {'> 20 km': 1, '10 - 20 km': 2, '< 10 km': 3}
+
+#map_three_topsis = {'small': 1, 'medium': 5, 'large': 9}
+#map_competences_topsis = {'>10': 1, '5 - 10': 5, '< 5 new competences': 9}
+#map_yes_no_topsis = {'no': 1, 'yes': 9}
+#map_part_full_topsis = {'part time': 1, 'full time': 5, 'not important': 9}
+#map_contract_topsis = {'part time': 1, 'full time': 9}
+#map_career_topsis = {'downgrade': 1, 'same': 3, 'not important': 6, 'upgrade career': 9}
+#map_advancement_topsis = {'down': 1, 'same': 5, 'up': 9}
+#map_hours_topsis = {'daily/night shift': 1, 'two-shift': 3, 'afternoon shift': 6, 'morning shift': 9}
+#map_distance_topsis = {'> 20 km': 1, '10 - 20 km': 5, '< 10 km': 9}
+
+replacement_maps_topsis = {
+    col_available_positions: map_three_topsis,
+    col_skp_vs_esco: map_competences_topsis,
+    col_languages: map_yes_no_topsis,
+    col_driving_license: map_yes_no_topsis,
+    col_age: map_yes_no_topsis,
+    col_disability: map_yes_no_topsis,
+    col_skp_wish: map_yes_no_topsis,
+    col_js_contract_wish: map_part_full_topsis,
+    col_job_contract: map_contract_topsis,
+    col_js_career: map_career_topsis,
+    col_job_advancement: map_advancement_topsis,
+    col_job_hours: map_hours_topsis,
+    col_js_hours: map_hours_topsis,
+    col_distance: map_distance_topsis,
+    col_location: map_yes_no_topsis
+}
+
+#Weights of the criteria (global weights from the dexi model)
+weights = np.array([9.82, 19.64, 4.42, 4.42, 13.68, 13.68, 4.56, 7.15, 4.77, 0, 4.47, 2.23, 2.23, 7.31, 1.62])
 
 def TOPSISReplaceValues(AlterTOPSIS: pd.DataFrame):
-    # Replace qualitative values with quantitative
-    # Simply begin with 1 for the lowest category and for each more valuable increase value by 1
-
-    map_three_topsis = {'small': 1, 'medium': 2, 'large': 3}
-    map_competences_topsis = {'>10': 1, '5 - 10': 2, '< 5 new competences': 3}
-    map_yes_no_topsis = {'no': 1, 'yes': 2}
-    map_part_full_topsis = {'part time': 1, 'full time': 2, 'not important': 3}
-    map_contract_topsis = {'part time': 1, 'full time': 2}
-    map_career_topsis = {'downgrade': 1, 'same': 2, 'not important': 3, 'upgrade career': 4}
-    map_advancement_topsis = {'down': 1, 'same': 2, 'up': 3}
-    map_hours_topsis = {'daily/night shift': 1, 'two-shift': 2, 'afternoon shift': 3, 'morning shift': 4}
-    map_distance_topsis = {'> 20 km': 1, '10 - 20 km': 2, '< 10 km': 3}
-
-    #map_three_topsis = {'small': 1, 'medium': 5, 'large': 9}
-    #map_competences_topsis = {'>10': 1, '5 - 10': 5, '< 5 new competences': 9}
-    #map_yes_no_topsis = {'no': 1, 'yes': 9}
-    #map_part_full_topsis = {'part time': 1, 'full time': 5, 'not important': 9}
-    #map_contract_topsis = {'part time': 1, 'full time': 9}
-    #map_career_topsis = {'downgrade': 1, 'same': 3, 'not important': 6, 'upgrade career': 9}
-    #map_advancement_topsis = {'down': 1, 'same': 5, 'up': 9}
-    #map_hours_topsis = {'daily/night shift': 1, 'two-shift': 3, 'afternoon shift': 6, 'morning shift': 9}
-    #map_distance_topsis = {'> 20 km': 1, '10 - 20 km': 5, '< 10 km': 9}
-
-    replacement_maps_topsis = {
-        col_available_positions: map_three_topsis,
-        col_skp_vs_esco: map_competences_topsis,
-        col_languages: map_yes_no_topsis,
-        col_driving_license: map_yes_no_topsis,
-        col_age: map_yes_no_topsis,
-        col_disability: map_yes_no_topsis,
-        col_skp_wish: map_yes_no_topsis,
-        col_js_contract_wish: map_part_full_topsis,
-        col_job_contract: map_contract_topsis,
-        col_js_career: map_career_topsis,
-        col_job_advancement: map_advancement_topsis,
-        col_job_hours: map_hours_topsis,
-        col_js_hours: map_hours_topsis,
-        col_distance: map_distance_topsis,
-        col_location: map_yes_no_topsis
-    }
-
-    pd.set_option('future.no_silent_downcasting', True)
-
-    for column, value_map in replacement_maps_topsis.items():
-        AlterTOPSIS[column] = AlterTOPSIS[column].replace(value_map)
-
-    return AlterTOPSIS
-
-def GetTOPSISRankingResults(AlterTOPSIS: pd.DataFrame):
-    #Weights of the criteria (global weights from the dexi model)
-    weights = array([9.82, 19.64, 4.42, 4.42, 13.68, 13.68, 4.56, 7.15, 4.77, 0, 4.47, 2.23, 2.23, 7.31, 1.62])
-
-    print('Weights of the criteria')
-    print(weights)
-    print('-' * 58)
-
-    # Convert DataFrame to NumPy array
+    # Replace qualitative values with quantitative (replacement_maps_topsis), AlterTOPSIS is not changed
+    return pd.DataFrame(EncodeValues(AlterTOPSIS, replacement_maps_topsis, np.int8),
+                        index=AlterTOPSIS.index, columns=columns, copy=False)
+
+def TOPSISColumnStats(AlterArray, block_size=65536):
+    """Sum of squares, min and max value of each criterion, computed in blocks of rows.
+
+    Sums of integer values are exact (int64), so the stats of parts of a dataset can be added up in any order.
+    """
+    integer = np.issubdtype(AlterArray.dtype, np.integer)
+    sum_squares = np.zeros(AlterArray.shape[1], dtype=np.int64 if integer else np.float64)
+    min_values = np.full(AlterArray.shape[1], np.iinfo(np.int64).max if integer else np.inf, dtype=sum_squares.dtype)
+    max_values = np.full(AlterArray.shape[1], np.iinfo(np.int64).min if integer else -np.inf, dtype=sum_squares.dtype)
+
+    for first in range(0, AlterArray.shape[0], block_size):
+        block = AlterArray[first:first + block_size]
+        sum_squares += np.sum(np.square(block, dtype=sum_squares.dtype), axis=0)
+        min_values = np.minimum(min_values, np.min(block, axis=0))
+        max_values = np.maximum(max_values, np.max(block, axis=0))
+
+    return sum_squares, min_values, max_values
+
+def TOPSISIdealSolutions(norms, min_values, max_values, weights=weights, dtype=np.float32):
+    """Scale of the criteria and the ideal solutions.
+
+    Weighted normalised value is value * weight / norm = value * scale. The scale is not negative,
+    so the positive (negative) ideal solution is the max (min) value times the scale.
+
+    Args:
+        norms (ndarray): Vector norm (square root of the sum of squares) of each criterion.
+        min_values, max_values (ndarray): Min and max value of each criterion.
+        weights (ndarray): Weights of the criteria.
+        dtype: Data type of the computation.
+
+    Returns:
+        tuple: (scale, positive ideal solution, negative ideal solution), arrays with one value per criterion.
+    """
+    if np.any(np.asarray(weights) < 0):
+        raise ValueError("Weights of the criteria must not be negative")
+
+    norms = np.asarray(norms, dtype=np.float64)
+    scale = np.divide(weights, norms, out=np.zeros(len(norms)), where=norms != 0).astype(dtype)
+
+    # Same float operation as the weighted normalised values, so the ideal solutions are their exact max and min
+    pis = np.asarray(max_values).astype(dtype) * scale
+    nis = np.asarray(min_values).astype(dtype) * scale
+
+    return scale, pis, nis
+
+def TOPSISDistances(AlterArray, scale, pis, nis, block_size=65536):
+    """Distances of the alternatives to the positive and the negative ideal solution.
+
+    Rows are processed in blocks: the weighted normalised values of a block are computed once into a scratch
+    buffer and both distances are taken from it, the scratch buffers are reused for all blocks.
+
+    Returns:
+        tuple: (dpis, dnis) arrays with one distance per alternative.
+    """
+    n = AlterArray.shape[0]
+    dtype = scale.dtype
+
+    dpis = np.empty(n, dtype=dtype)
+    dnis = np.empty(n, dtype=dtype)
+
+    wnx = np.empty((min(block_size, n), len(scale)), dtype=dtype)
+    diff = np.empty_like(wnx)
+
+    for first in range(0, n, block_size):
+        last = min(first + block_size, n)
+        block_wnx = wnx[:last - first]
+        block_diff = diff[:last - first]
+
+        np.multiply(AlterArray[first:last], scale, out=block_wnx)
+
+        for ideal, distances in ((pis, dpis), (nis, dnis)):
+            np.subtract(block_wnx, ideal, out=block_diff)
+            np.square(block_diff, out=block_diff)
+            np.sum(block_diff, axis=1, out=distances[first:last])
+
+    np.sqrt(dpis, out=dpis)
+    np.sqrt(dnis, out=dnis)
+
+    return dpis, dnis
+
+def TOPSISCloseness(dpis, dnis):
+    # Relative closeness to the ideal solution
+    return dnis / (dpis + dnis)
+
+def MergeTOPSISStats(stats, other):
+    # Stats of two parts of a dataset (TOPSISColumnStats) as the stats of the whole, None is an empty part
+    if stats is None:
+        return other
+
+    return stats[0] + other[0], np.minimum(stats[1], other[1]), np.maximum(stats[2], other[2])
+
+def TOPSISStreamingScores(read_chunks, weights=weights, dtype=np.float32):
+    """Two-pass TOPSIS over a dataset read in chunks, the memory used does not depend on the number of alternatives.
+
+    The first pass accumulates the sum of squares, min and max of each criterion, which give the norms and the
+    ideal solutions. The second pass reads the chunks again and yields the closeness of every chunk.
+
+    Args:
+        read_chunks: Function returning a new iterable of (index, values (alternatives x criteria)) chunks,
+            it is called once for every pass.
+        weights (ndarray): Weights of the criteria.
+        dtype: Data type of the computation.
+
+    Yields:
+        tuple: (index of the chunk, closeness of the alternatives of the chunk).
+    """
+    stats = None
+    for index, values in read_chunks():
+        stats = MergeTOPSISStats(stats, TOPSISColumnStats(values))
+
+    if stats is None:
+        return
+
+    sum_squares, min_values, max_values = stats
+    norms = np.sqrt(sum_squares)
+    scale, pis, nis = TOPSISIdealSolutions(norms, min_values, max_values, weights, dtype)
+
+    LogData('Vector norm of each criterion:', norms)
+    LogData('Positive ideal solution:', pis)
+    LogData('Negative ideal solution:', nis)
+
+    for index, values in read_chunks():
+        yield index, TOPSISCloseness(*TOPSISDistances(values, scale, pis, nis))
+
+def GetTOPSISWeightScores(AlterArray, weight_matrix, dtype=np.float32, block_size=65536):
+    """Closeness of the same alternatives for several weight vectors in one pass.
+
+    The values are normalised once. The squared distance of the weight vector w is
+    sum(w^2 * (normalised value - ideal)^2), so the distances of all weight vectors are one matrix product
+    of the squared differences and the squared weights per block of rows.
+
+    Args:
+        AlterArray (ndarray): Values of the alternatives (alternatives x criteria).
+        weight_matrix (ndarray): Weight vectors (K x criteria), weights must not be negative.
+        dtype: Data type of the computation.
+
+    Returns:
+        tuple: (closeness (K x alternatives), ranking places (K x alternatives)).
+    """
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype=np.float64))
+    if weight_matrix.shape[1] != AlterArray.shape[1]:
+        raise ValueError("Weight vectors have %d criteria and not %d" % (weight_matrix.shape[1], AlterArray.shape[1]))
+    if np.any(weight_matrix < 0):
+        raise ValueError("Weights of the criteria must not be negative")
+
+    # Normalised values and ideal solutions are the same for all weight vectors (weight 1 for every criterion)
+    sum_squares, min_values, max_values = TOPSISColumnStats(AlterArray, block_size)
+    scale, pis, nis = TOPSISIdealSolutions(np.sqrt(sum_squares), min_values, max_values,
+                                           np.ones(AlterArray.shape[1]), dtype)
+    squared_weights = np.square(weight_matrix).astype(dtype)
+
+    n = AlterArray.shape[0]
+    dpis = np.empty((len(weight_matrix), n), dtype=dtype)
+    dnis = np.empty((len(weight_matrix), n), dtype=dtype)
+
+    nx = np.empty((min(block_size, n), len(scale)), dtype=dtype)
+    diff = np.empty_like(nx)
+
+    for first in range(0, n, block_size):
+        last = min(first + block_size, n)
+        block_nx = nx[:last - first]
+        block_diff = diff[:last - first]
+
+        np.multiply(AlterArray[first:last], scale, out=block_nx)
+
+        for ideal, distances in ((pis, dpis), (nis, dnis)):
+            np.subtract(block_nx, ideal, out=block_diff)
+            np.square(block_diff, out=block_diff)
+            distances[:, first:last] = squared_weights @ block_diff.T
+
+    np.sqrt(dpis, out=dpis)
+    np.sqrt(dnis, out=dnis)
+
+    # Closeness in place of the distances to the negative ideal solution
+    closeness = np.divide(dnis, np.add(dpis, dnis, out=dpis), out=dnis)
+    ranks = np.stack([RankScores(scores) for scores in closeness]) if len(closeness) else \
+        np.empty((0, n), dtype=np.int32)
+
+    return closeness, ranks
+
+def GetTOPSISRankingResults(AlterTOPSIS: pd.DataFrame, dtype=np.float32, weights=weights):
+    """TOPSIS closeness of the alternatives.
+
+    Args:
+        AlterTOPSIS (DataFrame): Quantitative values of the alternatives (TOPSISReplaceValues).
+        dtype: Data type of the computation.
+        weights (ndarray): Weights of the criteria, weights must not be negative
+            (a weight sweep of a weight matrix is GetTOPSISWeightScores).
+
+    Returns:
+        DataFrame with the closeness in the column TOPSIS.
+    """
+    if np.ndim(weights) != 1:
+        raise ValueError("Weights of the criteria must be one vector, weight matrices are ranked by "
+                         "GetTOPSISWeightScores")
+
+    LogData('Weights of the criteria', weights)
+
+    # Values of the alternatives (int8 category values, no copy)
     AlterArray = AlterTOPSIS.to_numpy()
-    
-    # Extract the index as a NumPy array
-    index_array = AlterTOPSIS.index.to_numpy()
-
-    # Step 1 (vector normalization): cumsum() produces the
-    # cumulative sum of the values in the array and can also
-    # be used with a second argument to indicate the axis to use
-
-    # === START OF THIRD-PARTY CODE ===
-    k = array(cumsum(AlterArray ** 2, 0))
-    norm_x = array([[AlterArray[i, j] / sqrt(k[AlterArray.shape[0] - 1, j]) for j in range(AlterArray.shape[1])]
-                    for i in range(AlterArray.shape[0])])
-    # === END OF THIRD-PARTY CODE ===
-
-    # Print the normalised matrix
-    print('Normalised matrix:')
-    print(norm_x)
-    print('-' * 58)
-
-    # Step 2 (Multiply each evaluation by the associated weight):
-    # wnx is the weighted normalized x matrix
-
-    # === START OF THIRD-PARTY CODE ===
-    wnx = array([[norm_x[i, j] * weights[j]
-                  for j in range(norm_x.shape[1])]
-                 for i in range(norm_x.shape[0])])
-    # === END OF THIRD-PARTY CODE ===
-
-    # Print the weighted normalised matrix
-    print('Weighted normalised matrix:')
-    print(wnx)
-    print('-' * 58)
-
-    # Step 3 (positive and negative ideal solution)
-    pis = array(amax(wnx, axis=0))
-    nis = array(amin(wnx, axis=0))
+
+    # Step 1 (vector normalization): norm of each criterion
+    sum_squares, min_values, max_values = TOPSISColumnStats(AlterArray)
+    norms = np.sqrt(sum_squares)
+
+    LogData('Vector norm of each criterion:', norms)
+
+    # Step 2 and 3 (weighted normalised values and the positive and negative ideal solution)
+    scale, pis, nis = TOPSISIdealSolutions(norms, min_values, max_values, weights, dtype)
 
     # Print the positive ideal soluton values
-    print('Positive ideal solution:')
-    print(pis)
-    print('-' * 58)
+    LogData('Positive ideal solution:', pis)
 
     # Print the negative ideal soluton values
-    print('Negative ideal solution:')
-    print(nis)
-    print('-' * 58)
-
-    # Step 4a: determine the distance to the positive ideal
-    # solution (dpis)
-
-    # === START OF THIRD-PARTY CODE ===
-    a = array([[(wnx[i, j] - pis[j]) ** 2
-                for j in range(wnx.shape[1])]
-               for i in range(wnx.shape[0])])
-    dpis = sqrt(sum(a, 1))
-    # === END OF THIRD-PARTY CODE ===
-
-    # Step 4a: determine the distance to the negative ideal
-    # solution (dnis)
-
-    # === START OF THIRD-PARTY CODE ===
-    a = array([[(wnx[i, j] - nis[j]) ** 2
-                for j in range(wnx.shape[1])]
-               for i in range(wnx.shape[0])])
-    dnis = sqrt(sum(a, 1))
-    # === END OF THIRD-PARTY CODE ===
+    LogData('Negative ideal solution:', nis)
+
+    # Step 4: determine the distance to the positive and to the negative ideal solution
+    dpis, dnis = TOPSISDistances(AlterArray, scale, pis, nis)
 
     # Print the distance to the negative ideal solution
-    print('Distance to the negative ideal solution')
-    print(dnis)
-    print('-' * 58)
+    LogData('Distance to the negative ideal solution', dnis)
 
-    # Step 5: calculate the relative closeness to the ideal
-    # solution
-    RankingScores = array([dnis[i] / (dpis[i] + dnis[i]) for i in range(0, len(dpis))])
+    # Step 5: calculate the relative closeness to the ideal solution
+    RankingScores = TOPSISCloseness(dpis, dnis)
 
-    AlterRankings_df = pd.DataFrame(RankingScores, index=index_array, columns=['TOPSIS'])
+    AlterRankings_df = pd.DataFrame(RankingScores, index=AlterTOPSIS.index, columns=['TOPSIS'])
 
     return AlterRankings_df
 
-filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
-#filename = 'TotalSKPData.csv'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+def main():
+    filename = 'AHP_test.csv'  #load test sample (this is small sample of data for testing purposes)
+    #filename = 'TotalSKPData.skp'  #load complete TotalSKPData (first run MCDMAnalysis_SKPdata.py to generate the dataset)
+    #datasets larger than the memory: run the two-pass streaming TOPSIS of MCDMAnalysis_Pipeline.py
+
+    verbosity = 'summary'  #'silent', 'summary' or 'full' (print whole DataFrames and matrices)
+    SetVerbosity(verbosity)
+
+    directory = './Results'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    if filename.endswith('.skp'):
+        TotalSKPData_df = LoadSKPDataFrame('./' + filename)
+    else:
+        TotalSKPData_df = pd.read_csv('./'+filename, index_col=0, delimiter=';')
 
-directory = './Results'
-if not os.path.exists(directory):
-    os.makedirs(directory)
+    LogData("TotalSKPData dataframe:", TotalSKPData_df)
 
-TotalSKPData_df = pd.read_csv('./'+filename, index_col=0, delimiter=';')
+    # TOPSIS Ranking
+    LogMessage("TOPSIS RANKING:")
+    LogSeparator()
 
-print("TotalSKPData dataframe:")
-print(TotalSKPData_df)
-print('-' * 58)
+    TotalSKPData_RepVal = TOPSISReplaceValues(TotalSKPData_df)
 
-# TOPSIS Ranking
-print("TOPSIS RANKING:")
-print('-' * 58)
+    LogData("TotalSKPData Criteria categories values dataframe:", TotalSKPData_RepVal)
 
-TotalSKPData_RepVal = TOPSISReplaceValues(TotalSKPData_df)
+    TOPSISRanking_df = GetTOPSISRankingResults(TotalSKPData_RepVal)
 
-print("TotalSKPData Criteria categories values dataframe:")
-print(TotalSKPData_RepVal)
-print('-' * 58)
+    # Print final ranking
+    LogRanking('TOPSIS final ranking results:', TOPSISRanking_df)
 
-TOPSISRanking_df = GetTOPSISRankingResults(TotalSKPData_RepVal)
+    TOPSISRanking_df.to_csv(directory + '/TOPSIS_Results.csv', sep=';', index=True, header=True)
 
-# Print final ranking
-print('TOPSIS final ranking results:')
-print(TOPSISRanking_df)
-print('-' * 58)
+    results = ResultStore(GetResultStorePath(directory, filename), ids=TOPSISRanking_df.index)
+    results.write('TOPSIS', TOPSISRanking_df['TOPSIS'], {'weights': weights, 'values': replacement_maps_topsis})
 
-TOPSISRanking_df.to_csv(directory + '/TOPSIS_Results.csv', sep=';', index=True, header=True)
\ No newline at end of file
+if __name__ == '__main__':
+    main()